@@ -0,0 +1,21 @@
+"""Shared manager instances for CLI commands"""
+
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def get_db_manager():
+    """Return the process-wide DatabaseManager"""
+    from ..database.manager import DatabaseManager
+    return DatabaseManager()
+
+@lru_cache(maxsize=1)
+def get_rule_manager():
+    """Return the process-wide RuleManager"""
+    from ..rules.manager import RuleManager
+    return RuleManager()
+
+@lru_cache(maxsize=1)
+def get_rule_engine():
+    """Return a RuleEngine sharing the process-wide managers"""
+    from ..core.engine import RuleEngine
+    return RuleEngine(db_manager=get_db_manager(), rule_manager=get_rule_manager())
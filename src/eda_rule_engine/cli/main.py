@@ -3,14 +3,14 @@
 import typer
 from rich.console import Console
 from rich.table import Table
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Iterable
 import sys
 
-from ..core.engine import RuleEngine
-from ..database.manager import DatabaseManager
-from ..rules.manager import RuleManager
+from .. import __version__
 
 console = Console()
+# Progress and errors, kept off stdout so machine-readable output can be piped
+err_console = Console(stderr=True)
 app = typer.Typer(
     name="eda-rule-engine",
     help="Data Accuracy Test Rule Engine - Validate business logic rules across databases",
@@ -22,9 +22,32 @@ config_app = typer.Typer(name="config", help="Database configuration management"
 rule_app = typer.Typer(name="rule", help="Rule management and execution")
 report_app = typer.Typer(name="report", help="Generate validation reports")
 
-app.add_typer(config_app, name="config")
-app.add_typer(rule_app, name="rule") 
-app.add_typer(report_app, name="report")
+_SUB_APPS = {"config": config_app, "rule": rule_app, "report": report_app}
+
+def _register_sub_apps(argv: List[str]):
+    """Attach only the sub-command group named on the command line"""
+    requested = argv[1] if len(argv) > 1 else None
+    # --help, top-level commands and unknown input still see every group
+    names = [requested] if requested in _SUB_APPS else list(_SUB_APPS)
+    for name in names:
+        app.add_typer(_SUB_APPS[name], name=name)
+
+_register_sub_apps(sys.argv)
+
+def _version_callback(value: bool):
+    """Print the package version and exit"""
+    if value:
+        typer.echo(__version__)
+        raise typer.Exit()
+
+@app.callback()
+def main(
+    version: Optional[bool] = typer.Option(
+        None, "--version", "-V", callback=_version_callback, is_eager=True,
+        help="Show the version and exit"
+    )
+):
+    """Data Accuracy Test Rule Engine"""
 
 @app.command()
 def init(
@@ -32,10 +55,10 @@ def init(
     database_type: str = typer.Option("postgresql", help="Database type (postgresql, mysql, sqlite)")
 ):
     """Initialize a new EDA Rule Engine project"""
+    from ..utils.config import ConfigManager
     console.print(f"🚀 Initializing new project: [bold cyan]{project_name}[/bold cyan]")
     
     # Create project configuration
-    from ..utils.config import ConfigManager
     config_manager = ConfigManager()
     config_manager.init_project(project_name, database_type)
     
@@ -56,6 +79,7 @@ def add_database(
     password: Optional[str] = typer.Option(None, help="Password (will be prompted securely)")
 ):
     """Add a new database connection"""
+    from ._deps import get_db_manager
     console.print(f"🔗 Adding database connection: [bold cyan]{name}[/bold cyan]")
     
     # Prompt for password securely if not provided
@@ -66,7 +90,7 @@ def add_database(
     if port is None:
         port = {"postgresql": 5432, "mysql": 3306}.get(db_type, 5432)
     
-    db_manager = DatabaseManager()
+    db_manager = get_db_manager()
     try:
         db_manager.add_connection(name, db_type, host, port, database, username, password)
         console.print("✅ Database connection added successfully!")
@@ -82,9 +106,13 @@ def add_database(
         sys.exit(1)
 
 @config_app.command("list-db")
-def list_databases():
+def list_databases(
+    check: bool = typer.Option(False, "--check", help="Test each connection and show its status")
+):
     """List all configured database connections"""
-    db_manager = DatabaseManager()
+    from concurrent.futures import ThreadPoolExecutor
+    from ._deps import get_db_manager
+    db_manager = get_db_manager()
     connections = db_manager.list_connections()
     
     if not connections:
@@ -98,13 +126,20 @@ def list_databases():
     table.add_column("Database", style="yellow")
     table.add_column("Status", style="bold")
     
-    for conn in connections:
-        status = "🟢 Active" if db_manager.test_connection(str(conn['name'])) else "🔴 Inactive"
+    if check:
+        # Probe connections concurrently; each test is a blocking network round-trip
+        with ThreadPoolExecutor(max_workers=min(16, len(connections))) as executor:
+            reachable = list(executor.map(lambda c: db_manager.test_connection(c['name']), connections))
+        statuses = ["🟢 Active" if ok else "🔴 Inactive" for ok in reachable]
+    else:
+        statuses = ["— (use --check)"] * len(connections)
+    
+    for conn, status in zip(connections, statuses):
         table.add_row(
-            str(conn['name']),
-            str(conn['type']),
-            str(conn['host']),
-            str(conn['database']),
+            conn['name'],
+            conn['type'],
+            conn['host'] or "",
+            conn['database'],
             status
         )
     
@@ -119,9 +154,10 @@ def create_rule(
     description: str = typer.Option("", help="Rule description")
 ):
     """Create a new validation rule"""
+    from ._deps import get_rule_manager
     console.print(f"📝 Creating rule: [bold cyan]{name}[/bold cyan]")
     
-    rule_manager = RuleManager()
+    rule_manager = get_rule_manager()
     
     try:
         # Interactive rule creation based on type
@@ -137,16 +173,26 @@ def create_rule(
 
 @rule_app.command("list")
 def list_rules(
-    status: Optional[str] = typer.Option(None, help="Filter by status (active, inactive)")
+    status: Optional[str] = typer.Option(None, help="Filter by status (active, inactive)"),
+    page: int = typer.Option(1, min=1, help="Page number to display"),
+    page_size: int = typer.Option(100, min=1, help="Rules shown per page")
 ):
     """List all validation rules"""
-    rule_manager = RuleManager()
+    from ._deps import get_rule_manager
+    rule_manager = get_rule_manager()
     rules = rule_manager.list_rules(status)
     
     if not rules:
         console.print("📭 No rules found")
         return
     
+    total = len(rules)
+    offset = (page - 1) * page_size
+    rules = rules[offset:offset + page_size]
+    if not rules:
+        console.print(f"📭 Page {page} is empty ({total} rules)")
+        return
+    
     table = Table(title="Validation Rules")
     table.add_column("ID", style="cyan")
     table.add_column("Name", style="bold")
@@ -157,15 +203,18 @@ def list_rules(
     
     for rule in rules:
         table.add_row(
-            str(rule['id']),
-            str(rule['name']),
-            str(rule['type']),
-            f"{rule['table']}.{rule.get('column', '*')}",
-            str(rule['status']),
-            str(rule.get('last_run', 'Never'))
+            rule['id'],
+            rule['name'],
+            rule['type'],
+            f"{rule['table']}.{rule['column'] or '*'}",
+            rule['status'],
+            rule['last_run'] or "Never"
         )
     
     console.print(table)
+    if total > page_size:
+        console.print(f"Showing {offset + 1}-{offset + len(rules)} of {total} rules "
+                      f"(use [cyan]--page[/cyan] to see more)")
 
 @rule_app.command("run")
 def run_rule(
@@ -174,39 +223,45 @@ def run_rule(
     output_format: str = typer.Option("table", help="Output format (table, json, csv)")
 ):
     """Execute a validation rule"""
-    console.print(f"⚡ Running rule: [bold cyan]{rule_id}[/bold cyan]")
+    from ._deps import get_rule_engine
+    # JSON output owns stdout; the banner and spinner go to stderr
+    status_console = err_console if output_format == "json" else console
+    status_console.print(f"⚡ Running rule: [bold cyan]{rule_id}[/bold cyan]")
     
-    engine = RuleEngine()
+    engine = get_rule_engine()
     
     try:
-        with console.status("[bold green]Executing rule..."):
+        with status_console.status("[bold green]Executing rule..."):
             result = engine.execute_rule(rule_id, database)
         
         _display_rule_result(result, output_format)
         
     except Exception as e:
-        console.print(f"❌ Error executing rule: {e}")
+        err_console.print(f"❌ Error executing rule: {e}")
         sys.exit(1)
 
 @rule_app.command("run-batch")
 def run_batch_rules(
     table: Optional[str] = typer.Option(None, help="Run all rules for specific table"),
     tag: Optional[str] = typer.Option(None, help="Run rules with specific tag"),
-    database: Optional[str] = typer.Option(None, help="Database connection to use")
+    database: Optional[str] = typer.Option(None, help="Database connection to use"),
+    workers: Optional[int] = typer.Option(None, min=1, help="Maximum rules executed concurrently")
 ):
     """Execute multiple validation rules"""
+    from ._deps import get_rule_engine
     console.print("⚡ Running batch validation...")
     
-    engine = RuleEngine()
+    engine = get_rule_engine()
     
     try:
-        with console.status("[bold green]Executing rules..."):
-            results = engine.execute_batch_rules(table=table, tag=tag, database=database)
-        
+        # Rows are rendered as each rule finishes rather than after the slowest one
+        results = engine.execute_batch_rules_iter(
+            table=table, tag=tag, database=database, max_workers=workers
+        )
         _display_batch_results(results)
         
     except Exception as e:
-        console.print(f"❌ Error executing batch rules: {e}")
+        err_console.print(f"❌ Error executing batch rules: {e}")
         sys.exit(1)
 
 @report_app.command("summary")
@@ -215,13 +270,13 @@ def generate_summary_report(
     days: int = typer.Option(7, help="Number of days to include in report")
 ):
     """Generate a summary validation report"""
+    from ..core.reporter import Reporter
     console.print(f"📊 Generating summary report for last {days} days...")
     
-    from ..core.reporter import Reporter
     reporter = Reporter()
     
     try:
-        report = reporter.generate_summary_report(database, days)
+        report = reporter.generate_summary_report(database, days, top_k=5)
         _display_summary_report(report)
         
     except Exception as e:
@@ -256,10 +311,27 @@ def _interactive_rule_creation(rule_type: str, table: str, column: Optional[str]
         
     return config
 
+def _write_json(data: Any):
+    """Write data to stdout as one line of JSON, using orjson when available"""
+    try:
+        import orjson
+    except ImportError:
+        import json
+        json.dump(data, sys.stdout, default=str)
+        sys.stdout.write("\n")
+    else:
+        sys.stdout.flush()
+        sys.stdout.buffer.write(orjson.dumps(data, default=str) + b"\n")
+    sys.stdout.flush()
+
 def _display_rule_result(result: Dict[str, Any], output_format: str):
     """Display rule execution result"""
     if output_format == "json":
-        console.print_json(data=result)
+        if sys.stdout.isatty():
+            console.print_json(data=result)
+        else:
+            # Piped output: skip rich's highlighter and write compact JSON
+            _write_json(result)
         return
     
     # Table format
@@ -272,28 +344,35 @@ def _display_rule_result(result: Dict[str, Any], output_format: str):
     if result['failed_records'] > 0:
         console.print(f"Failed Records: [red]{result['failed_records']}[/red]")
 
-def _display_batch_results(results: List[Dict[str, Any]]):
-    """Display batch rule execution results"""
+def _display_batch_results(results: Iterable[Dict[str, Any]]):
+    """Display batch rule execution results as they arrive"""
+    from rich.live import Live
+    
     table = Table(title="Batch Validation Results")
     table.add_column("Rule", style="cyan")
     table.add_column("Status", style="bold")
     table.add_column("Records", style="yellow")
     table.add_column("Pass Rate", style="green")
     
-    total_rules = len(results)
-    passed_rules = sum(1 for r in results if r.get('passed', False))
+    total_rules = 0
+    passed_rules = 0
     
-    for result in results:
-        status = "✅ PASS" if result.get('passed', False) else "❌ FAIL"
-        table.add_row(
-            str(result.get('rule_name', 'Unknown')),
-            status,
-            str(result.get('total_records', 0)),
-            f"{result.get('pass_rate', 0):.1f}%"
-        )
+    with Live(table, console=console, refresh_per_second=10):
+        for result in results:
+            total_rules += 1
+            if result.get('passed', False):
+                passed_rules += 1
+                status = "✅ PASS"
+            else:
+                status = "❌ FAIL"
+            table.add_row(
+                str(result.get('rule_name', 'Unknown')),
+                status,
+                str(result.get('total_records', 0)),
+                f"{result.get('pass_rate', 0):.1f}%"
+            )
     
-    console.print(table)
-    console.print(f"\n📈 Overall: {passed_rules}/{total_rules} rules passed ({passed_rules/total_rules*100:.1f}%)")
+    console.print(f"\n📈 Overall: {passed_rules}/{total_rules} rules passed ({passed_rules / max(total_rules, 1) * 100:.1f}%)")
 
 def _display_summary_report(report: Dict[str, Any]):
     """Display summary report"""
@@ -308,11 +387,15 @@ def _display_summary_report(report: Dict[str, Any]):
     top_issues = report.get('top_issues', [])
     if top_issues:
         console.print("\n🔍 Top Issues:")
-        for issue in top_issues[:5]:
+        for issue in top_issues:
             if isinstance(issue, dict):
                 rule_name = issue.get('rule_name', 'Unknown')
                 failure_rate = issue.get('failure_rate', 0)
                 console.print(f"  • {rule_name}: {failure_rate:.1f}% failure rate")
 
 if __name__ == "__main__":
+    # Answer a bare --version without building the Click command tree
+    if len(sys.argv) == 2 and sys.argv[1] in ("-V", "--version"):
+        print(__version__)
+        sys.exit(0)
     app()
\ No newline at end of file
@@ -2,23 +2,31 @@
 
 import time
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterator, Callable
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 
 from ..database.manager import DatabaseManager
 from ..rules.manager import RuleManager, Rule
-from ..parsers.sql_generator import SQLGenerator
+from ..parsers.sql_generator import SQLGenerator, TOTAL_COUNT_COLUMN, FAILED_COUNT_COLUMN
+from .reporter import Reporter
 
 logger = logging.getLogger(__name__)
 
 class RuleExecutionResult:
     """Result of a rule execution"""
     
+    # Batches create one result per rule; skip the per-instance __dict__
+    __slots__ = (
+        'rule_name', 'rule_id', 'start_time', 'end_time', 'total_records',
+        'passed_records', 'failed_records', 'pass_rate', 'execution_time',
+        'passed', 'error', 'failed_samples'
+    )
+    
     def __init__(self, rule_name: str, rule_id: str):
         self.rule_name = rule_name
         self.rule_id = rule_id
-        self.start_time = time.time()
+        self.start_time = time.perf_counter_ns()  # Monotonic; immune to wall-clock steps
         self.end_time = None
         self.total_records = 0
         self.passed_records = 0
@@ -31,12 +39,17 @@ class RuleExecutionResult:
     
     def finish(self):
         """Mark execution as finished and calculate metrics"""
-        self.end_time = time.time()
-        self.execution_time = self.end_time - self.start_time
+        self.end_time = time.perf_counter_ns()
+        self.execution_time = (self.end_time - self.start_time) / 1e9
         
         if self.total_records > 0:
+            # All records must pass; decide on exact counts, not the rounded rate
+            self.passed = (
+                self.error is None
+                and self.failed_records == 0
+                and self.passed_records == self.total_records
+            )
             self.pass_rate = (self.passed_records / self.total_records) * 100
-            self.passed = self.pass_rate >= 100  # All records must pass for rule to pass
         else:
             self.pass_rate = 0.0
             self.passed = False
@@ -59,10 +72,26 @@ class RuleExecutionResult:
 class RuleEngine:
     """Core engine for executing validation rules"""
     
-    def __init__(self):
-        self.db_manager = DatabaseManager()
-        self.rule_manager = RuleManager()
-        self.sql_generator = SQLGenerator()
+    # Rules are I/O-bound on the database, so run more of them than CPU cores
+    DEFAULT_MAX_WORKERS = 16
+    
+    def __init__(
+        self,
+        db_manager: Optional[DatabaseManager] = None,
+        rule_manager: Optional[RuleManager] = None
+    ):
+        self.db_manager = db_manager or DatabaseManager()
+        self.rule_manager = rule_manager or RuleManager()
+        # One generator per database type, so identifiers are quoted for each connection's dialect
+        self._sql_generators: Dict[str, SQLGenerator] = {}
+        self.reporter = Reporter()
+        self._processors: Dict[str, Callable[[Rule, List[Dict], RuleExecutionResult], None]] = {
+            'value_range': self._process_value_range_result,
+            'value_template': self._process_value_template_result,
+            'data_continuity': self._process_data_continuity_result,
+            'statistical_comparison': self._process_statistical_comparison_result,
+            'cross_table_comparison': self._process_cross_table_comparison_result,
+        }
     
     def execute_rule(self, rule_id: str, database: Optional[str] = None) -> Dict:
         """Execute a single validation rule"""
@@ -80,18 +109,12 @@ class RuleEngine:
         result = RuleExecutionResult(rule.name, rule.id)
         
         try:
-            # Generate SQL query for the rule
-            sql_query, count_query = self.sql_generator.generate_validation_sql(rule)
-            
             logger.info(f"Executing rule '{rule.name}' on database '{database}'")
-            logger.debug(f"Generated SQL: {sql_query}")
             
-            # Execute count query to get total records
-            count_result = self.db_manager.execute_query(database, count_query)
-            result.total_records = count_result[0]['total_count'] if count_result else 0
-            
-            # Execute validation query
-            validation_result = self.db_manager.execute_query(database, sql_query)
+            if self.db_manager.supports_window_functions(database):
+                validation_result = self._query_combined(rule, database, result)
+            else:
+                validation_result = self._query_separately(rule, database, result)
             
             # Process results based on rule type
             self._process_rule_result(rule, validation_result, result)
@@ -106,20 +129,67 @@ class RuleEngine:
         result.finish()
         
         # Record result to history
-        from ..core.reporter import Reporter
-        reporter = Reporter()
-        reporter.record_execution_result(result.to_dict())
+        self.reporter.record_execution_result(result.to_dict())
         
         return result.to_dict()
     
+    def _sql_generator_for(self, database: str) -> SQLGenerator:
+        """Return the SQL generator for a connection's database type"""
+        db_type = self.db_manager.connections[database]['type']
+        generator = self._sql_generators.get(db_type)
+        if generator is None:
+            # setdefault keeps a single generator (and SQL cache) if worker threads race here
+            generator = self._sql_generators.setdefault(db_type, SQLGenerator(db_type))
+        return generator
+    
+    def _query_combined(self, rule: Rule, database: str, result: RuleExecutionResult) -> List[Dict]:
+        """Fetch total count, failed count and failed samples in one round-trip"""
+        sql_query, params = self._sql_generator_for(database).generate_combined_sql(rule)
+        logger.debug(f"Generated SQL: {sql_query} {params}")
+        
+        rows = self.db_manager.execute_query(database, sql_query, params)
+        result.total_records = rows[0][TOTAL_COUNT_COLUMN] if rows else 0
+        result.failed_records = (rows[0][FAILED_COUNT_COLUMN] or 0) if rows else 0
+        
+        # A lone row with a NULL failed count means nothing failed
+        return [
+            {k: v for k, v in row.items() if k not in (TOTAL_COUNT_COLUMN, FAILED_COUNT_COLUMN)}
+            for row in rows if row[FAILED_COUNT_COLUMN] is not None
+        ]
+    
+    def _query_separately(self, rule: Rule, database: str, result: RuleExecutionResult) -> List[Dict]:
+        """Fetch the counts and failed samples with two queries"""
+        sql_query, count_query, params = self._sql_generator_for(database).generate_validation_sql(rule)
+        logger.debug(f"Generated SQL: {sql_query} {params}")
+        
+        # Execute count query to get total and failed record counts
+        count_result = self.db_manager.execute_query(database, count_query, params)
+        if count_result:
+            result.total_records = count_result[0]['total_count'] or 0
+            result.failed_records = count_result[0]['failed_count'] or 0
+        
+        # Execute validation query; the SQL already limits it to a few samples
+        rows = self.db_manager.execute_query(database, sql_query, params)
+        return [dict(row) for row in rows]
+    
     def execute_batch_rules(
         self, 
         table: Optional[str] = None, 
         tag: Optional[str] = None,
         database: Optional[str] = None,
-        max_workers: int = 4
+        max_workers: Optional[int] = None
     ) -> List[Dict]:
         """Execute multiple rules in parallel"""
+        return list(self.execute_batch_rules_iter(table, tag, database, max_workers))
+    
+    def execute_batch_rules_iter(
+        self, 
+        table: Optional[str] = None, 
+        tag: Optional[str] = None,
+        database: Optional[str] = None,
+        max_workers: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """Execute multiple rules in parallel, yielding each result as it completes"""
         
         # Get rules to execute
         if table:
@@ -127,15 +197,16 @@ class RuleEngine:
         elif tag:
             rules = self.rule_manager.get_rules_by_tag(tag)
         else:
-            rules = [rule for rule in self.rule_manager.rules.values() if rule.status == 'active']
+            rules = self.rule_manager.get_active_rules()
         
         if not rules:
-            return []
+            return
         
-        results = []
+        # Never start more threads than there are rules to run
+        max_workers = min(max_workers or self.DEFAULT_MAX_WORKERS, len(rules))
         
-        # Execute rules in parallel
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Execute rules in parallel, writing the result history and last-run times once at the end
+        with self.reporter.batch(), self.rule_manager.batch(), ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_rule = {
                 executor.submit(self.execute_rule, rule.id, database): rule 
                 for rule in rules
@@ -144,56 +215,42 @@ class RuleEngine:
             for future in as_completed(future_to_rule):
                 try:
                     result = future.result()
-                    results.append(result)
                 except Exception as e:
                     rule = future_to_rule[future]
                     logger.error(f"Error executing rule '{rule.name}': {e}")
                     error_result = RuleExecutionResult(rule.name, rule.id)
                     error_result.error = str(e)
                     error_result.finish()
-                    results.append(error_result.to_dict())
-        
-        return results
+                    result = error_result.to_dict()
+                yield result
     
     def _process_rule_result(self, rule: Rule, query_result: List[Dict], result: RuleExecutionResult):
         """Process query results based on rule type"""
-        
-        if rule.rule_type == 'value_range':
-            self._process_value_range_result(rule, query_result, result)
-        elif rule.rule_type == 'value_template':
-            self._process_value_template_result(rule, query_result, result)
-        elif rule.rule_type == 'data_continuity':
-            self._process_data_continuity_result(rule, query_result, result)
-        elif rule.rule_type == 'statistical_comparison':
-            self._process_statistical_comparison_result(rule, query_result, result)
-        elif rule.rule_type == 'cross_table_comparison':
-            self._process_cross_table_comparison_result(rule, query_result, result)
-        else:
+        processor = self._processors.get(rule.rule_type)
+        if processor is None:
             raise ValueError(f"Unsupported rule type: {rule.rule_type}")
+        processor(rule, query_result, result)
+    
+    @staticmethod
+    def _record_failed_rows(failed_rows: List[Dict], result: RuleExecutionResult):
+        """Record passed count and failed samples; failed_records is already set by the query"""
+        result.passed_records = result.total_records - result.failed_records
+        result.failed_samples = failed_rows
     
     def _process_value_range_result(self, rule: Rule, query_result: List[Dict], result: RuleExecutionResult):
         """Process value range validation results"""
-        if query_result:
-            # Query returns records that are OUT OF RANGE (failed)
-            result.failed_records = len(query_result)
-            result.passed_records = result.total_records - result.failed_records
-            result.failed_samples = query_result[:5]  # Store first 5 failed records
+        # Query returns records that are OUT OF RANGE (failed)
+        self._record_failed_rows(query_result, result)
     
     def _process_value_template_result(self, rule: Rule, query_result: List[Dict], result: RuleExecutionResult):
         """Process value template (regex) validation results"""
-        if query_result:
-            # Query returns records that DON'T MATCH pattern (failed)
-            result.failed_records = len(query_result)
-            result.passed_records = result.total_records - result.failed_records
-            result.failed_samples = query_result[:5]
+        # Query returns records that DON'T MATCH pattern (failed)
+        self._record_failed_rows(query_result, result)
     
     def _process_data_continuity_result(self, rule: Rule, query_result: List[Dict], result: RuleExecutionResult):
         """Process data continuity validation results"""
-        if query_result:
-            # Query returns gaps or inconsistencies
-            result.failed_records = len(query_result)
-            result.passed_records = result.total_records - result.failed_records
-            result.failed_samples = query_result[:5]
+        # Query returns gaps or inconsistencies
+        self._record_failed_rows(query_result, result)
     
     def _process_statistical_comparison_result(self, rule: Rule, query_result: List[Dict], result: RuleExecutionResult):
         """Process statistical comparison results"""
@@ -211,11 +268,17 @@ class RuleEngine:
     
     def _process_cross_table_comparison_result(self, rule: Rule, query_result: List[Dict], result: RuleExecutionResult):
         """Process cross-table comparison results"""
-        if query_result:
-            # Query returns records where comparison failed
-            result.failed_records = len(query_result)
-            result.passed_records = result.total_records - result.failed_records
-            result.failed_samples = query_result[:5]
+        # Query returns records where comparison failed
+        self._record_failed_rows(query_result, result)
+    
+    def _table_info(self, db_name: str, table: str) -> Dict:
+        """Get table metadata from the database manager's schema cache"""
+        return self.db_manager.get_table_info(db_name, table)
+    
+    def clear_schema_cache(self):
+        """Forget cached table metadata, e.g. after DDL changes"""
+        for connection in self.db_manager.list_connections():
+            self.db_manager.invalidate_schema(connection['name'])
     
     def validate_rule_configuration(self, rule: Rule) -> List[str]:
         """Validate rule configuration and return list of errors"""
@@ -226,7 +289,7 @@ class RuleEngine:
             connections = self.db_manager.list_connections()
             if connections:
                 db_name = connections[0]['name']
-                table_info = self.db_manager.get_table_info(db_name, rule.config.table)
+                table_info = self._table_info(db_name, rule.config.table)
                 if not table_info['columns']:
                     errors.append(f"Table '{rule.config.table}' not found or has no columns")
                 
@@ -1,58 +1,238 @@
 """Reporting system for EDA Rule Engine"""
 
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Iterator, Tuple
+import heapq
 import json
 import os
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; fall back to the stdlib json module
+    orjson = None  # type: ignore[assignment]
+
+from ..utils.files import atomic_write
+
+# Pre-JSONL history file, migrated on first load
+LEGACY_RESULTS_FILE = ".eda-results.json"
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize an object to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, default=str).encode('utf-8')
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _with_epoch(result: Dict) -> Dict:
+    """Ensure a loaded result carries '_ts', parsed once from its ISO timestamp"""
+    if '_ts' not in result:
+        try:
+            result['_ts'] = datetime.fromisoformat(result.get('timestamp', '')).timestamp()
+        except (TypeError, ValueError):
+            result['_ts'] = 0.0  # Unparseable timestamps fall outside every report window
+    return result
 
 class Reporter:
     """Generate reports and analytics for rule executions"""
     
-    def __init__(self, results_file: str = ".eda-results.json"):
+    # Number of results kept in memory and after compacting the history file
+    HISTORY_LIMIT = 1000
+    # Memoised reports kept, and how long one stays valid while history is unchanged
+    REPORT_MEMO_SIZE = 32
+    REPORT_MEMO_TTL = 60.0
+    
+    def __init__(self, results_file: str = ".eda-results.jsonl"):
         self.results_file = results_file
+        self._lines_on_disk = 0
         self.results_history = self._load_results_history()
+        # Running maximum of '_ts' per history entry: non-decreasing, so it can be bisected
+        self._ts_index: List[float] = []
+        for result in self.results_history:
+            self._index_ts(result)
+        self._pending: List[Dict] = []
+        self._batch_depth = 0
+        self._lock = threading.Lock()
+        self._history_version = 0
+        self._report_memo: "OrderedDict[Tuple, Tuple[int, float, Dict]]" = OrderedDict()
     
     def _load_results_history(self) -> List[Dict]:
-        """Load historical results from file"""
-        if os.path.exists(self.results_file):
-            try:
-                with open(self.results_file, 'r') as f:
-                    return json.load(f)
-            except Exception:
-                return []
-        return []
+        """Load historical results from file, one JSON document per line"""
+        if not os.path.exists(self.results_file):
+            return self._migrate_legacy_history()
+        
+        history: List[Dict] = []
+        try:
+            with open(self.results_file, 'rb') as f:
+                for line in f:
+                    self._lines_on_disk += 1
+                    if line.strip():
+                        try:
+                            history.append(_with_epoch(_loads(line)))
+                        except ValueError:
+                            continue  # Skip a torn or corrupt line
+        except OSError:
+            history.clear()
+        del history[:-self.HISTORY_LIMIT]
+        return history
+    
+    def _migrate_legacy_history(self) -> List[Dict]:
+        """Convert a legacy single-document JSON history into the JSONL file"""
+        history: List[Dict] = []
+        legacy_file = os.path.join(os.path.dirname(self.results_file), LEGACY_RESULTS_FILE)
+        if not os.path.exists(legacy_file):
+            return history
+        try:
+            with open(legacy_file, 'rb') as f:
+                history.extend(_with_epoch(result) for result in _loads(f.read()))
+            del history[:-self.HISTORY_LIMIT]
+        except Exception:
+            history.clear()
+            return history
+        self.results_history = history
+        self._save_results_history()
+        return history
     
     def _save_results_history(self):
-        """Save results history to file"""
-        with open(self.results_file, 'w') as f:
-            json.dump(self.results_history, f, indent=2, default=str)
+        """Rewrite the history file with just the in-memory results"""
+        with atomic_write(self.results_file, 'wb') as f:
+            f.writelines(_dumps(result) + b'\n' for result in self.results_history)
+        self._lines_on_disk = len(self.results_history)
+    
+    def _append_results(self, results: List[Dict]):
+        """Append results to the history file, compacting it when it grows too long"""
+        with open(self.results_file, 'ab') as f:
+            f.write(b''.join(_dumps(result) + b'\n' for result in results))
+        self._lines_on_disk += len(results)
+        
+        # Compact at twice the limit so the rewrite cost is amortised over many appends
+        if self._lines_on_disk > 2 * self.HISTORY_LIMIT:
+            self._save_results_history()
     
     def record_execution_result(self, result: Dict):
         """Record a rule execution result"""
-        result['timestamp'] = datetime.now().isoformat()
-        self.results_history.append(result)
-        
-        # Keep only last 1000 results to prevent file from growing too large
-        if len(self.results_history) > 1000:
-            self.results_history = self.results_history[-1000:]
+        now = datetime.now()
+        result['timestamp'] = now.isoformat()
+        result['_ts'] = now.timestamp()  # Epoch seconds for cheap date filtering
+        with self._lock:
+            self.results_history.append(result)
+            self._index_ts(result)
+            # Keep only the newest results; trimmed in place so the index stays aligned
+            if len(self.results_history) > self.HISTORY_LIMIT:
+                del self.results_history[:-self.HISTORY_LIMIT]
+                del self._ts_index[:-self.HISTORY_LIMIT]
+            self._history_version += 1
+            self._pending.append(result)
+            if self._batch_depth == 0:
+                self._flush_locked()
+    
+    def _index_ts(self, result: Dict):
+        """Extend the timestamp index in step with results_history"""
+        ts = result.get('_ts', 0.0)
+        if self._ts_index and self._ts_index[-1] > ts:
+            ts = self._ts_index[-1]
+        self._ts_index.append(ts)
+    
+    def _results_since(self, cutoff: float) -> Iterator[Dict]:
+        """Iterate over results recorded at or after the cutoff epoch"""
+        # Every entry before start has a running maximum, and so a '_ts', below the cutoff
+        start = bisect_left(self._ts_index, cutoff)
+        for result in self.results_history[start:]:
+            # Checked again in case the clock stepped back between recordings
+            if result.get('_ts', 0.0) >= cutoff:
+                yield result
+    
+    def flush(self):
+        """Write any buffered results to the history file"""
+        with self._lock:
+            self._flush_locked()
+    
+    def _flush_locked(self):
+        """Persist pending results; caller must hold the lock"""
+        if self._pending:
+            self._append_results(self._pending)
+            self._pending.clear()
+    
+    @contextmanager
+    def batch(self):
+        """Buffer results recorded inside the block and write them once on exit"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._flush_locked()
+    
+    def _memoized(self, key: Tuple, build: Callable[[], Dict]) -> Dict:
+        """Return a cached report for key, rebuilding it if history changed or it expired"""
+        with self._lock:
+            now = time.monotonic()
+            entry = self._report_memo.get(key)
+            if entry is not None:
+                version, built_at, report = entry
+                if version == self._history_version and now - built_at < self.REPORT_MEMO_TTL:
+                    self._report_memo.move_to_end(key)
+                    return report
+            
+            report = build()
+            self._report_memo[key] = (self._history_version, now, report)
+            self._report_memo.move_to_end(key)
+            while len(self._report_memo) > self.REPORT_MEMO_SIZE:
+                self._report_memo.popitem(last=False)
+            return report
+    
+    def generate_summary_report(self, database: Optional[str] = None, days: int = 7, top_k: int = 10) -> Dict:
+        """Generate a summary report for the specified period, listing the top_k worst rules
         
-        self._save_results_history()
+        Reports are memoised; treat the returned dict as read-only.
+        """
+        return self._memoized(
+            ('summary', database, days, top_k),
+            lambda: self._build_summary_report(database, days, top_k)
+        )
     
-    def generate_summary_report(self, database: Optional[str] = None, days: int = 7) -> Dict:
-        """Generate a summary report for the specified period"""
+    def _build_summary_report(self, database: Optional[str], days: int, top_k: int) -> Dict:
+        """Aggregate the summary report from the results history"""
         cutoff_date = datetime.now() - timedelta(days=days)
         
-        # Filter results by date and database
-        filtered_results = []
-        for result in self.results_history:
-            try:
-                result_date = datetime.fromisoformat(result.get('timestamp', ''))
-                if result_date >= cutoff_date:
-                    filtered_results.append(result)
-            except:
-                continue
-        
-        if not filtered_results:
+        # Filter by date and aggregate in a single pass over the history
+        cutoff = cutoff_date.timestamp()
+        total_executions = 0
+        pass_rate_sum = 0.0
+        pass_rate_count = 0
+        rule_stats: Dict[str, Dict] = defaultdict(lambda: {
+            'rule_name': '',
+            'total_executions': 0,
+            'total_pass_rate': 0.0,
+            'failure_count': 0
+        })
+        get_stats = rule_stats.__getitem__  # Bound once; local lookups are cheapest in the loop
+        for result in self._results_since(cutoff):
+            total_executions += 1
+            if 'pass_rate' in result:
+                pass_rate_sum += result['pass_rate']
+                pass_rate_count += 1
+            
+            stats = get_stats(result['rule_id'])
+            stats['rule_name'] = result['rule_name']
+            stats['total_executions'] += 1
+            stats['total_pass_rate'] += result.get('pass_rate', 0.0)
+            if not result.get('passed', False):
+                stats['failure_count'] += 1
+        
+        if not total_executions:
             return {
                 'overall_score': 0.0,
                 'total_rules': 0,
@@ -62,50 +242,29 @@ class Reporter:
             }
         
         # Calculate metrics
-        total_executions = len(filtered_results)
-        total_rules = len(set(r['rule_id'] for r in filtered_results))
-        
-        pass_rates = [r['pass_rate'] for r in filtered_results if 'pass_rate' in r]
-        avg_pass_rate = sum(pass_rates) / len(pass_rates) if pass_rates else 0.0
+        total_rules = len(rule_stats)
+        avg_pass_rate = pass_rate_sum / pass_rate_count if pass_rate_count else 0.0
         
         # Calculate overall score (weighted by execution time and success rate)
         overall_score = avg_pass_rate * 0.8 + (total_executions / (days * 10)) * 0.2
         overall_score = min(100.0, overall_score)
         
-        # Find top issues (rules with lowest pass rates)
-        rule_stats = {}
-        for result in filtered_results:
-            rule_id = result['rule_id']
-            rule_name = result['rule_name']
-            if rule_id not in rule_stats:
-                rule_stats[rule_id] = {
-                    'rule_name': rule_name,
-                    'total_executions': 0,
-                    'total_pass_rate': 0.0,
-                    'failure_count': 0
-                }
-            
-            rule_stats[rule_id]['total_executions'] += 1
-            rule_stats[rule_id]['total_pass_rate'] += result.get('pass_rate', 0.0)
-            if not result.get('passed', False):
-                rule_stats[rule_id]['failure_count'] += 1
-        
-        # Calculate average pass rates and failure rates
-        top_issues = []
-        for rule_id, stats in rule_stats.items():
-            avg_pass_rate = stats['total_pass_rate'] / stats['total_executions']
-            failure_rate = (stats['failure_count'] / stats['total_executions']) * 100
-            
-            top_issues.append({
+        # Rules with the highest failure rates are the top issues; select them without a full sort
+        worst = heapq.nlargest(
+            top_k,
+            rule_stats.items(),
+            key=lambda item: item[1]['failure_count'] / item[1]['total_executions']
+        )
+        top_issues = [
+            {
                 'rule_name': stats['rule_name'],
                 'rule_id': rule_id,
-                'avg_pass_rate': avg_pass_rate,
-                'failure_rate': failure_rate,
+                'avg_pass_rate': stats['total_pass_rate'] / stats['total_executions'],
+                'failure_rate': (stats['failure_count'] / stats['total_executions']) * 100,
                 'executions': stats['total_executions']
-            })
-        
-        # Sort by failure rate (highest first)
-        top_issues.sort(key=lambda x: x['failure_rate'], reverse=True)
+            }
+            for rule_id, stats in worst
+        ]
         
         return {
             'overall_score': overall_score,
@@ -118,19 +277,22 @@ class Reporter:
         }
     
     def generate_trend_report(self, rule_id: str, days: int = 30) -> Dict:
-        """Generate a trend report for a specific rule"""
+        """Generate a trend report for a specific rule
+        
+        Reports are memoised; treat the returned dict as read-only.
+        """
+        return self._memoized(
+            ('trend', rule_id, days),
+            lambda: self._build_trend_report(rule_id, days)
+        )
+    
+    def _build_trend_report(self, rule_id: str, days: int) -> Dict:
+        """Aggregate the trend report for one rule from the results history"""
         cutoff_date = datetime.now() - timedelta(days=days)
         
         # Filter results for specific rule
-        rule_results = []
-        for result in self.results_history:
-            try:
-                result_date = datetime.fromisoformat(result.get('timestamp', ''))
-                if (result_date >= cutoff_date and 
-                    result.get('rule_id') == rule_id):
-                    rule_results.append(result)
-            except:
-                continue
+        cutoff = cutoff_date.timestamp()
+        rule_results = [r for r in self._results_since(cutoff) if r.get('rule_id') == rule_id]
         
         if not rule_results:
             return {
@@ -141,20 +303,17 @@ class Reporter:
             }
         
         # Group by day
-        daily_stats = {}
+        daily_stats: Dict[str, Dict] = defaultdict(lambda: {
+            'executions': 0,
+            'total_pass_rate': 0.0,
+            'total_records': 0
+        })
+        get_stats = daily_stats.__getitem__
         for result in rule_results:
-            date_str = result['timestamp'][:10]  # YYYY-MM-DD
-            if date_str not in daily_stats:
-                daily_stats[date_str] = {
-                    'date': date_str,
-                    'executions': 0,
-                    'total_pass_rate': 0.0,
-                    'total_records': 0
-                }
-            
-            daily_stats[date_str]['executions'] += 1
-            daily_stats[date_str]['total_pass_rate'] += result.get('pass_rate', 0.0)
-            daily_stats[date_str]['total_records'] += result.get('total_records', 0)
+            stats = get_stats(result['timestamp'][:10])  # YYYY-MM-DD
+            stats['executions'] += 1
+            stats['total_pass_rate'] += result.get('pass_rate', 0.0)
+            stats['total_records'] += result.get('total_records', 0)
         
         # Calculate daily averages
         trend_data = []
@@ -1,53 +1,62 @@
 """Database connection manager for EDA Rule Engine"""
 
 import yaml
-import os
-from typing import Dict, List, Optional, Any
-from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
+import threading
+import time
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, List, Optional, Any, Iterator, Sequence, Tuple, Union
+from sqlalchemy import bindparam, create_engine, inspect, text
+from sqlalchemy.engine import Engine, ObjectKind, RowMapping
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.exc import SQLAlchemyError
 import logging
+from ..utils.files import atomic_write
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 
 class DatabaseManager:
     """Manages database connections and configurations"""
     
+    SCHEMA_CACHE_TTL = 300.0  # seconds a cached table description stays valid
+    
     def __init__(self, config_file: str = ".eda-config.yaml"):
         self.config_file = config_file
         self.connections: Dict[str, Dict] = {}
+        self._other_config: Dict[str, Any] = {}  # Non-database sections, preserved on save
         self._engines: Dict[str, Engine] = {}
+        self._engines_lock = threading.Lock()
+        self._window_support: Dict[str, bool] = {}
+        self._schema_cache: Dict[Tuple[str, str], Tuple[float, Dict]] = {}
+        self._schema_ttl = self.SCHEMA_CACHE_TTL
         self._load_config()
     
     def _load_config(self):
         """Load database configurations from file"""
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r') as f:
-                    config = yaml.safe_load(f) or {}
-                    self.connections = config.get('databases', {})
-            except Exception as e:
-                logger.warning(f"Could not load config file: {e}")
-                self.connections = {}
-        else:
+        try:
+            with open(self.config_file, 'rb') as f:
+                config = yaml.load(f, Loader=SafeLoader) or {}
+                self.connections = config.pop('databases', None) or {}
+                self._other_config = config
+        except FileNotFoundError:
+            self.connections = {}
+        except Exception as e:
+            logger.warning(f"Could not load config file: {e}")
             self.connections = {}
     
     def _save_config(self):
-        """Save current configurations to file"""
-        config = {'databases': self.connections}
-        
-        # Load existing config to preserve other settings
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r') as f:
-                    existing_config = yaml.safe_load(f) or {}
-                    existing_config.update(config)
-                    config = existing_config
-            except Exception:
-                pass
+        """Save current configurations to file, preserving other settings"""
+        config = {**self._other_config, 'databases': self.connections}
         
-        with open(self.config_file, 'w') as f:
-            yaml.dump(config, f, default_flow_style=False)
+        # Write to a sibling file and swap it in, so readers never see a partial config
+        with atomic_write(self.config_file) as f:
+            yaml.dump(config, f, Dumper=SafeDumper,
+                      default_flow_style=None, sort_keys=False, allow_unicode=True, width=10_000)
     
     def add_connection(
         self, 
@@ -78,7 +87,9 @@ class DatabaseManager:
         self.connections[name] = connection_config
         self._save_config()
         
-        # Clear cached engine if exists
+        # Clear cached engine and server capabilities if they exist
+        self._window_support.pop(name, None)
+        self.invalidate_schema(name)
         if name in self._engines:
             self._engines[name].dispose()
             del self._engines[name]
@@ -88,6 +99,7 @@ class DatabaseManager:
         if name in self.connections:
             del self.connections[name]
             self._save_config()
+            self.invalidate_schema(name)
             
             if name in self._engines:
                 self._engines[name].dispose()
@@ -112,10 +124,12 @@ class DatabaseManager:
         if name not in self.connections:
             raise ValueError(f"Connection '{name}' not found")
         
-        if name not in self._engines:
-            self._engines[name] = self._create_engine(self.connections[name])
-        
-        return self._engines[name]
+        # Engines are shared across worker threads; build each pool only once
+        with self._engines_lock:
+            if name not in self._engines:
+                self._engines[name] = self._create_engine(self.connections[name])
+            
+            return self._engines[name]
     
     def _create_engine(self, config: Dict) -> Engine:
         """Create SQLAlchemy engine from config"""
@@ -126,11 +140,48 @@ class DatabaseManager:
         elif db_type == 'mysql':
             url = f"mysql+pymysql://{config['username']}:{config['password']}@{config['host']}:{config['port']}/{config['database']}"
         elif db_type == 'sqlite':
-            url = f"sqlite:///{config['database']}"
+            # SQLAlchemy already pools file-based SQLite connections across threads
+            return create_engine(f"sqlite:///{config['database']}")
         else:
             raise ValueError(f"Unsupported database type: {db_type}")
         
-        return create_engine(url, pool_pre_ping=True)
+        # Sized for concurrent batch execution; recycle before server idle timeouts
+        # (e.g. MySQL wait_timeout) and reuse the most recently returned connection
+        return create_engine(
+            url,
+            pool_size=10,
+            max_overflow=20,
+            pool_recycle=1800,
+            pool_pre_ping=True,
+            pool_use_lifo=True
+        )
+    
+    def supports_window_functions(self, name: str) -> bool:
+        """Check whether a connection's server supports SQL window functions"""
+        if name not in self._window_support:
+            self._window_support[name] = self._detect_window_functions(name)
+        return self._window_support[name]
+    
+    def _detect_window_functions(self, name: str) -> bool:
+        """Detect window function support from the dialect and server version"""
+        db_type = self.connections[name]['type']
+        
+        if db_type == 'postgresql':
+            return True
+        if db_type == 'sqlite':
+            import sqlite3
+            return sqlite3.sqlite_version_info >= (3, 25, 0)
+        
+        # MySQL 8.0+ and MariaDB 10.2+
+        try:
+            engine = self.get_engine(name)
+            with engine.connect() as conn:
+                version = conn.dialect.server_version_info or ()
+            minimum = (10, 2) if getattr(engine.dialect, 'is_mariadb', False) else (8, 0)
+            return tuple(version) >= minimum
+        except Exception as e:
+            logger.warning(f"Could not detect server version for '{name}': {e}")
+            return False
     
     def test_connection(self, name: str) -> bool:
         """Test if a database connection is working"""
@@ -143,47 +194,145 @@ class DatabaseManager:
             logger.error(f"Connection test failed for '{name}': {e}")
             return False
     
-    def execute_query(self, name: str, query: str, params: Optional[Dict] = None) -> List[Dict]:
-        """Execute a query and return results"""
+    def execute_query(
+        self, name: str, query: Union[str, TextClause], params: Optional[Dict] = None
+    ) -> Sequence[RowMapping]:
+        """Execute a query and return results as read-only row mappings
+        
+        Rows support dict-style access but callers must not mutate them; copy with
+        dict(row) where a real dict is needed.
+        """
+        if isinstance(query, str):
+            query = text(query)
         try:
             engine = self.get_engine(name)
             with engine.connect() as conn:
-                result = conn.execute(text(query), params or {})
-                return [dict(row._mapping) for row in result.fetchall()]
+                result = conn.execute(query, params or {})
+                return result.mappings().all()
+        except SQLAlchemyError as e:
+            logger.error(f"Query execution failed: {e}")
+            raise
+    
+    def iter_query(
+        self,
+        name: str,
+        query: Union[str, TextClause],
+        params: Optional[Dict] = None,
+        chunk: int = 500
+    ) -> Iterator[RowMapping]:
+        """Execute a query and yield row mappings, fetching them in chunks
+        
+        Uses a server-side cursor where the driver supports one, so memory stays bounded
+        by the chunk size. The connection is held until the iterator is exhausted or closed.
+        Rows are read-only; callers must not mutate them.
+        """
+        if isinstance(query, str):
+            query = text(query)
+        try:
+            engine = self.get_engine(name)
+            with engine.connect().execution_options(stream_results=True, yield_per=chunk) as conn:
+                yield from conn.execute(query, params or {}).mappings()
         except SQLAlchemyError as e:
             logger.error(f"Query execution failed: {e}")
             raise
     
     def get_table_info(self, name: str, table_name: str) -> Dict:
         """Get information about a table"""
+        return self.get_tables_info(name, [table_name])[table_name]
+    
+    def get_tables_info(self, name: str, table_names: List[str]) -> Dict[str, Dict]:
+        """Get information about several tables at once, keyed by table name"""
+        tables: Dict[str, Dict] = {}
+        missing = []
+        now = time.monotonic()
+        for table_name in table_names:
+            cached = self._schema_cache.get((name, table_name))
+            if cached is not None and now - cached[0] < self._schema_ttl:
+                tables[table_name] = cached[1]
+            else:
+                tables[table_name] = {'table_name': table_name, 'columns': []}
+                missing.append(table_name)
+        if not missing:
+            return tables
+        
+        try:
+            found = self._reflect_columns(name, missing)
+        except Exception as e:
+            logger.debug(f"Reflection failed, querying the catalog directly: {e}")
+            try:
+                found = self._query_columns(name, missing)
+            except Exception as e:
+                logger.error(f"Failed to get table info: {e}")
+                return tables
+        
+        for table_name, columns in found.items():
+            if table_name in tables and columns:
+                tables[table_name]['columns'] = columns
+                # Only cache tables that were found, so a table created later is picked up
+                self._schema_cache[(name, table_name)] = (now, tables[table_name])
+        return tables
+    
+    def _reflect_columns(self, name: str, table_names: List[str]) -> Dict[str, List[Dict]]:
+        """Describe table columns through SQLAlchemy's dialect-aware reflection"""
+        inspector = inspect(self.get_engine(name))
+        reflected = inspector.get_multi_columns(filter_names=table_names, kind=ObjectKind.ANY)
+        return {
+            table_name: [
+                {
+                    'column_name': column['name'],
+                    'data_type': str(column['type']),
+                    'is_nullable': 'YES' if column['nullable'] else 'NO'
+                }
+                for column in columns
+            ]
+            for (_schema, table_name), columns in reflected.items()
+        }
+    
+    def _query_columns(self, name: str, table_names: List[str]) -> Dict[str, List[Dict]]:
+        """Describe table columns with a hand-written catalog query"""
         db_type = self.connections[name]['type']
         
-        if db_type == 'postgresql':
+        if db_type in ('postgresql', 'mysql'):
+            # Alias every column: MySQL reports information_schema names in upper case
             query = """
-                SELECT column_name, data_type, is_nullable
+                SELECT table_name AS table_name, column_name AS column_name,
+                       data_type AS data_type, is_nullable AS is_nullable
                 FROM information_schema.columns 
-                WHERE table_name = :table_name
-                ORDER BY ordinal_position
+                WHERE table_name IN :names
+                ORDER BY table_name, ordinal_position
             """
-        elif db_type == 'mysql':
+        else:  # sqlite
             query = """
-                SELECT column_name, data_type, is_nullable
-                FROM information_schema.columns 
-                WHERE table_name = :table_name
-                ORDER BY ordinal_position
+                SELECT m.name AS table_name, p.name AS column_name, p.type AS data_type,
+                       CASE WHEN p."notnull" THEN 'NO' ELSE 'YES' END AS is_nullable
+                FROM sqlite_master m
+                JOIN pragma_table_info(m.name) p
+                WHERE m.type IN ('table', 'view') AND m.name IN :names
+                ORDER BY m.name, p.cid
             """
-        else:  # sqlite
-            query = f"PRAGMA table_info({table_name})"
+        statement = text(query).bindparams(bindparam('names', expanding=True))
+        rows = self.execute_query(name, statement, {'names': table_names})
         
-        try:
-            columns = self.execute_query(name, query, {'table_name': table_name})
-            return {
-                'table_name': table_name,
-                'columns': columns
-            }
-        except Exception as e:
-            logger.error(f"Failed to get table info: {e}")
-            return {'table_name': table_name, 'columns': []}
+        # Rows arrive ordered by table name, so each table is one contiguous group
+        return {
+            table_name: [
+                {
+                    'column_name': column['column_name'],
+                    'data_type': column['data_type'],
+                    'is_nullable': column['is_nullable']
+                }
+                for column in columns
+            ]
+            for table_name, columns in groupby(rows, key=itemgetter('table_name'))
+        }
+    
+    def invalidate_schema(self, name: str, table: Optional[str] = None):
+        """Drop cached table descriptions for a connection, or for one of its tables"""
+        if table is not None:
+            self._schema_cache.pop((name, table), None)
+        else:
+            for key in [key for key in self._schema_cache if key[0] == name]:
+                del self._schema_cache[key]
     
     def close_all_connections(self):
         """Close all database connections"""
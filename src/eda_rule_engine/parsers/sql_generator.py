@@ -1,187 +1,372 @@
 """SQL query generator for different rule types"""
 
 import re
-from typing import Tuple, Dict, Any
+import threading
+from typing import Tuple, Dict, Any, Optional, Callable
 from ..rules.manager import Rule
 
+# Column aliases carried on every row of a combined validation query
+TOTAL_COUNT_COLUMN = 'eda_total_count'
+FAILED_COUNT_COLUMN = 'eda_failed_count'
+
+_LIMIT_RE = re.compile(r'\blimit\b', re.IGNORECASE)
+
+# Identifiers matching this (and not reserved) are emitted as written, so existing
+# table/column names keep their case-folding behaviour; anything else is quoted
+_PLAIN_IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_$]*$')
+_RESERVED_WORDS = frozenset({
+    'all', 'and', 'as', 'asc', 'between', 'by', 'case', 'check', 'column', 'constraint',
+    'create', 'default', 'delete', 'desc', 'distinct', 'drop', 'else', 'end', 'from',
+    'group', 'having', 'in', 'index', 'insert', 'is', 'join', 'key', 'like', 'limit',
+    'not', 'null', 'offset', 'on', 'or', 'order', 'select', 'table', 'then', 'to',
+    'union', 'update', 'user', 'values', 'when', 'where', 'with',
+})
+_VALUE_TEMPLATE_CONTEXT_COLUMNS = frozenset({'id', 'name'})
+_AGGREGATE_FUNCTIONS = frozenset({'SUM', 'AVG', 'MIN', 'MAX', 'COUNT'})
+
 class SQLGenerator:
     """Generates SQL queries for validation rules"""
     
-    def __init__(self, database_type: str = 'sqlite'):
+    # Upper bound on distinct rule shapes kept in the SQL cache
+    CACHE_SIZE = 512
+    # SQL templates, formatted per rule. Identifiers are substituted into the text;
+    # values are left as bind parameters so statements are reusable across rules.
+    _NOT_NULL_COUNT_SQL = """
+        SELECT COUNT(*) as total_count
+        FROM {table}
+        WHERE {column} IS NOT NULL
+    """.strip()
+    
+    _TABLE_COUNT_SQL = """
+        SELECT COUNT(*) as total_count
+        FROM {table}
+    """.strip()
+    
+    _SINGLE_ROW_COUNT_SQL = "SELECT 1 as total_count"
+    
+    _DISTINCT_KEY_COUNT_SQL = """
+        SELECT COUNT(DISTINCT {key}) as total_count
+        FROM {table}
+        WHERE {column} IS NOT NULL
+    """.strip()
+    
+    # Failed-records templates select {projection}: the failed columns, or COUNT(*) to
+    # count the failures without wrapping the select list in a derived table
+    _VALUE_RANGE_SQL = """
+        SELECT {projection}
+        FROM {table}
+        WHERE {column} IS NOT NULL
+        AND ({column} < :min_val OR {column} > :max_val)
+    """.strip()
+    
+    _VALUE_TEMPLATE_SQL = """
+        SELECT {projection}
+        FROM {table}
+        WHERE {column} IS NOT NULL
+        AND {regex_condition}
+    """.strip()
+    
+    # Regex conditions for dialects with native regex operators
+    _REGEX_CONDITIONS = {
+        'postgresql': "{column} !~ :pattern",
+        'mysql': "{column} NOT REGEXP :pattern",
+    }
+    
+    _SQLITE_EMAIL_CONDITION = """({column} NOT LIKE '%@%.%'
+            OR {column} LIKE '%@%@%'
+            OR {column} LIKE '@%'
+            OR {column} LIKE '%@'
+            OR {column} LIKE '% %')"""
+    
+    _SQLITE_GLOB_CONDITION = "{column} NOT GLOB '*@*.*'"
+    
+    _SEQUENCE_GAPS_SQL = """
+        WITH sequence_check AS (
+            SELECT {column},
+                   LAG({column}) OVER (ORDER BY {column}) as prev_value
+            FROM {table}
+            WHERE {column} IS NOT NULL
+            ORDER BY {column}
+        )
+        SELECT {projection}
+        FROM sequence_check
+        WHERE prev_value IS NOT NULL
+        AND {column} - prev_value > 1
+    """.strip()
+    
+    _NULL_VALUES_SQL = """
+        SELECT {projection}
+        FROM {table}
+        WHERE {column} IS NULL
+    """.strip()
+    
+    _STATISTICAL_COMPARISON_SQL = """
+        WITH stats1 AS (
+            SELECT {operation}({column}) as value1
+            FROM {table}
+            WHERE {column} IS NOT NULL
+        ),
+        stats2 AS (
+            SELECT {operation}({compare_column}) as value2
+            FROM {compare_table}
+            WHERE {compare_column} IS NOT NULL
+        )
+        SELECT {projection}
+        FROM stats1, stats2
+    """.strip()
+    
+    _STATISTICAL_COMPARISON_COLUMNS = """
+            stats1.value1,
+            stats2.value2,
+            ABS(stats1.value1 - stats2.value2) as difference,
+            CASE
+                WHEN stats2.value2 = 0 THEN
+                    CASE WHEN stats1.value1 = 0 THEN 1 ELSE 0 END
+                ELSE
+                    CASE WHEN ABS(stats1.value1 - stats2.value2) / stats2.value2 <= :threshold THEN 1 ELSE 0 END
+            END as passed
+    """.strip()
+    
+    _CROSS_TABLE_COMPARISON_SQL = """
+        WITH table1_agg AS (
+            SELECT {table1_key}, {operation}({column}) as agg_value1
+            FROM {table}
+            WHERE {column} IS NOT NULL
+            GROUP BY {table1_key}
+        ),
+        table2_agg AS (
+            SELECT {table2_key}, {operation}({compare_column}) as agg_value2
+            FROM {compare_table}
+            WHERE {compare_column} IS NOT NULL
+            GROUP BY {table2_key}
+        )
+        SELECT {projection}
+        FROM table1_agg t1
+        LEFT JOIN table2_agg t2 ON t1.{table1_key} = t2.{table2_key}
+        WHERE t1.agg_value1 != COALESCE(t2.agg_value2, 0)
+    """.strip()
+    
+    _CROSS_TABLE_COMPARISON_COLUMNS = """
+            t1.{table1_key} as join_id,
+            t1.agg_value1,
+            t2.agg_value2,
+            ABS(t1.agg_value1 - COALESCE(t2.agg_value2, 0)) as difference
+    """.strip()
+    
+    def __init__(self, database_type: str = 'sqlite', failed_sample_limit: int = 5):
         self.database_type = database_type.lower()
+        # None means SQLite, which emulates regex checks with LIKE/GLOB
+        self._regex_tmpl = self._REGEX_CONDITIONS.get(self.database_type)
+        # Backticks on SQLite too: there a double-quoted name that matches no column
+        # silently becomes a string literal, while a backticked one is an error
+        self._quote_char = '"' if self.database_type == 'postgresql' else '`'
+        self.failed_sample_limit = failed_sample_limit
+        self._sql_cache: Dict[Tuple, Tuple[str, str, str, Dict[str, Any]]] = {}
+        # Rules run on a thread pool; guards cache insertion and eviction
+        self._cache_lock = threading.Lock()
+        self._generators: Dict[str, Callable[[Rule], Tuple[str, str, str, Dict[str, Any]]]] = {
+            'value_range': self._generate_value_range_sql,
+            'value_template': self._generate_value_template_sql,
+            'data_continuity': self._generate_data_continuity_sql,
+            'statistical_comparison': self._generate_statistical_comparison_sql,
+            'cross_table_comparison': self._generate_cross_table_comparison_sql,
+        }
     
-    def generate_validation_sql(self, rule: Rule) -> Tuple[str, str]:
-        """Generate validation SQL and count SQL for a rule"""
-        
-        if rule.rule_type == 'value_range':
-            return self._generate_value_range_sql(rule)
-        elif rule.rule_type == 'value_template':
-            return self._generate_value_template_sql(rule)
-        elif rule.rule_type == 'data_continuity':
-            return self._generate_data_continuity_sql(rule)
-        elif rule.rule_type == 'statistical_comparison':
-            return self._generate_statistical_comparison_sql(rule)
-        elif rule.rule_type == 'cross_table_comparison':
-            return self._generate_cross_table_comparison_sql(rule)
-        else:
+    def generate_validation_sql(self, rule: Rule) -> Tuple[str, str, Dict[str, Any]]:
+        """Generate validation SQL, count SQL and their bind parameters for a rule
+        
+        The validation SQL returns at most failed_sample_limit failed records. The count
+        SQL returns one row with total_count and failed_count. Both take the same parameters.
+        """
+        failed_sql, failed_count_sql, count_sql, params = self._get_rule_sql(rule)
+        sample_sql = f"{failed_sql}\nLIMIT {int(self.failed_sample_limit)}"
+        counts_sql = f"""
+            SELECT ({count_sql}) AS total_count,
+                   ({failed_count_sql}) AS failed_count
+        """.strip()
+        return sample_sql, counts_sql, params
+    
+    def generate_combined_sql(self, rule: Rule, sample_limit: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        """Generate one query (and its bind parameters) returning the total count, failed count and failed samples
+        
+        Every row carries TOTAL_COUNT_COLUMN and FAILED_COUNT_COLUMN. When no records
+        fail a single row is returned whose FAILED_COUNT_COLUMN is NULL. Requires
+        window function support.
+        """
+        if sample_limit is None:
+            sample_limit = self.failed_sample_limit
+        failed_sql, _, count_sql, params = self._get_rule_sql(rule)
+        sql = f"""
+            SELECT c.total_count AS {TOTAL_COUNT_COLUMN}, f.*
+            FROM ({count_sql}) c
+            LEFT JOIN (
+                SELECT COUNT(*) OVER () AS {FAILED_COUNT_COLUMN}, t.*
+                FROM ({failed_sql}) t
+                LIMIT {int(sample_limit)}
+            ) f ON 1 = 1
+        """.strip()
+        return sql, params
+    
+    def _get_rule_sql(self, rule: Rule) -> Tuple[str, str, str, Dict[str, Any]]:
+        """Return the cached (failed-records SQL, failed count SQL, count SQL, bind parameters) for a rule"""
+        key = self._cache_key(rule)
+        if key is None:
+            return self._generate_validation_sql(rule)
+        
+        cached = self._sql_cache.get(key)
+        if cached is None:
+            cached = self._generate_validation_sql(rule)
+            with self._cache_lock:
+                if len(self._sql_cache) >= self.CACHE_SIZE:
+                    # Evict the oldest entry (dicts preserve insertion order)
+                    self._sql_cache.pop(next(iter(self._sql_cache)), None)
+                self._sql_cache[key] = cached
+        return cached
+    
+    def clear_cache(self):
+        """Drop all cached SQL"""
+        with self._cache_lock:
+            self._sql_cache.clear()
+    
+    @staticmethod
+    def _cache_key(rule: Rule) -> Optional[Tuple]:
+        """Build a hashable key describing the rule's SQL shape, or None if not hashable"""
+        config = rule.config
+        key = (rule.rule_type, config.table, config.column, tuple(sorted(config.parameters.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    
+    def quote_identifier(self, identifier: str) -> str:
+        """Quote a (possibly schema-qualified) identifier for this dialect where needed"""
+        return '.'.join(self._quote_part(part) for part in identifier.split('.'))
+    
+    def _quote_part(self, part: str) -> str:
+        """Quote a single identifier part unless it is a plain, non-reserved name"""
+        if _PLAIN_IDENTIFIER_RE.match(part) and part.lower() not in _RESERVED_WORDS:
+            return part
+        q = self._quote_char
+        return f"{q}{part.replace(q, q + q)}{q}"
+    
+    @staticmethod
+    def _column(rule: Rule) -> str:
+        """Return the rule's column, which every SQL-generating rule type requires"""
+        if not rule.config.column:
+            raise ValueError(f"Rule type {rule.rule_type} requires a column")
+        return rule.config.column
+    
+    @staticmethod
+    def _aggregate(operation: str) -> str:
+        """Validate an aggregate function name before it is placed into SQL"""
+        function = operation.upper()
+        if function not in _AGGREGATE_FUNCTIONS:
+            raise ValueError(f"Unsupported operation: {operation}. Supported: {sorted(_AGGREGATE_FUNCTIONS)}")
+        return function
+    
+    @staticmethod
+    def _format_failed(template: str, projection: str, **fields: str) -> Tuple[str, str]:
+        """Format a failed-records template as (failed-records SQL, failed count SQL)"""
+        return template.format(projection=projection, **fields), template.format(projection='COUNT(*)', **fields)
+    
+    def _generate_validation_sql(self, rule: Rule) -> Tuple[str, str, str, Dict[str, Any]]:
+        """Dispatch SQL generation on the rule type; the failed-records SQL is unlimited"""
+        generate = self._generators.get(rule.rule_type)
+        if generate is None:
             raise ValueError(f"Unsupported rule type: {rule.rule_type}")
+        return generate(rule)
     
-    def _generate_value_range_sql(self, rule: Rule) -> Tuple[str, str]:
+    def _generate_value_range_sql(self, rule: Rule) -> Tuple[str, str, str, Dict[str, Any]]:
         """Generate SQL for value range validation"""
-        table = rule.config.table
-        column = rule.config.column
+        table = self.quote_identifier(rule.config.table)
+        column = self.quote_identifier(self._column(rule))
         params = rule.config.parameters
         
-        min_val = params['min_value']
-        max_val = params['max_value']
-        
         # Query to find records OUTSIDE the valid range (failures)
-        validation_sql = f"""
-            SELECT *
-            FROM {table}
-            WHERE {column} IS NOT NULL 
-            AND ({column} < {min_val} OR {column} > {max_val})
-            LIMIT 1000
-        """
+        validation_sql, failed_count_sql = self._format_failed(self._VALUE_RANGE_SQL, '*', table=table, column=column)
         
         # Count total records that are not null
-        count_sql = f"""
-            SELECT COUNT(*) as total_count
-            FROM {table}
-            WHERE {column} IS NOT NULL
-        """
+        count_sql = self._NOT_NULL_COUNT_SQL.format(table=table, column=column)
         
-        return validation_sql.strip(), count_sql.strip()
+        bind_params = {'min_val': params['min_value'], 'max_val': params['max_value']}
+        return validation_sql, failed_count_sql, count_sql, bind_params
     
-    def _generate_value_template_sql(self, rule: Rule) -> Tuple[str, str]:
+    def _generate_value_template_sql(self, rule: Rule) -> Tuple[str, str, str, Dict[str, Any]]:
         """Generate SQL for value template (regex) validation"""
-        table = rule.config.table
-        column = rule.config.column
+        table = self.quote_identifier(rule.config.table)
+        column = self.quote_identifier(self._column(rule))
         pattern = rule.config.parameters['pattern']
         
         # Database-specific regex syntax
-        if self.database_type == 'postgresql':
-            regex_condition = f"{column} !~ '{pattern}'"
-        elif self.database_type == 'mysql':
-            regex_condition = f"{column} NOT REGEXP '{pattern}'"
-        else:  # SQLite - use LIKE patterns for basic email validation
-            # Convert regex pattern to SQL LIKE pattern for basic cases
-            if 'email' in pattern.lower() or '@' in pattern:
-                # Simple email validation using LIKE pattern
-                regex_condition = f"""({column} NOT LIKE '%@%.%' 
-                                      OR {column} LIKE '%@%@%' 
-                                      OR {column} LIKE '@%' 
-                                      OR {column} LIKE '%@' 
-                                      OR {column} LIKE '% %')"""
-            else:
-                # For other patterns, use simple string checks
-                regex_condition = f"{column} NOT GLOB '*@*.*'"
-        
-        validation_sql = f"""
-            SELECT id, name, {column}
-            FROM {table}
-            WHERE {column} IS NOT NULL 
-            AND {regex_condition}
-            LIMIT 1000
-        """
+        bind_params: Dict[str, Any] = {}
+        if self._regex_tmpl is not None:
+            regex_condition = self._regex_tmpl.format(column=column)
+            bind_params['pattern'] = pattern
+        # SQLite - convert regex pattern to SQL LIKE pattern for basic cases
+        elif 'email' in pattern.lower() or '@' in pattern:
+            # Simple email validation using LIKE pattern
+            regex_condition = self._SQLITE_EMAIL_CONDITION.format(column=column)
+        else:
+            # For other patterns, use simple string checks
+            regex_condition = self._SQLITE_GLOB_CONDITION.format(column=column)
         
-        count_sql = f"""
-            SELECT COUNT(*) as total_count
-            FROM {table}
-            WHERE {column} IS NOT NULL
-        """
+        # Failed samples carry id and name for context; don't select the column twice
+        # when it is one of them, as duplicate names break derived tables on MySQL
+        select_list = ['id', 'name']
+        if self._column(rule).lower() not in _VALUE_TEMPLATE_CONTEXT_COLUMNS:
+            select_list.append(column)
+        
+        validation_sql, failed_count_sql = self._format_failed(
+            self._VALUE_TEMPLATE_SQL, ', '.join(select_list),
+            table=table, column=column, regex_condition=regex_condition
+        )
+        count_sql = self._NOT_NULL_COUNT_SQL.format(table=table, column=column)
         
-        return validation_sql.strip(), count_sql.strip()
+        return validation_sql, failed_count_sql, count_sql, bind_params
     
-    def _generate_data_continuity_sql(self, rule: Rule) -> Tuple[str, str]:
+    def _generate_data_continuity_sql(self, rule: Rule) -> Tuple[str, str, str, Dict[str, Any]]:
         """Generate SQL for data continuity validation"""
-        table = rule.config.table
-        column = rule.config.column
+        table = self.quote_identifier(rule.config.table)
+        column = self.quote_identifier(self._column(rule))
         params = rule.config.parameters
         
         # Example: Check for gaps in sequence
         if params.get('check_type') == 'sequence_gaps':
-            validation_sql = f"""
-                WITH sequence_check AS (
-                    SELECT {column}, 
-                           LAG({column}) OVER (ORDER BY {column}) as prev_value
-                    FROM {table}
-                    WHERE {column} IS NOT NULL
-                    ORDER BY {column}
-                )
-                SELECT *
-                FROM sequence_check
-                WHERE prev_value IS NOT NULL 
-                AND {column} - prev_value > 1
-                LIMIT 1000
-            """
+            template = self._SEQUENCE_GAPS_SQL
         else:
             # Default: Check for NULL values in sequence
-            validation_sql = f"""
-                SELECT *
-                FROM {table}
-                WHERE {column} IS NULL
-                LIMIT 1000
-            """
-        
-        count_sql = f"""
-            SELECT COUNT(*) as total_count
-            FROM {table}
-        """
+            template = self._NULL_VALUES_SQL
+        validation_sql, failed_count_sql = self._format_failed(template, '*', table=table, column=column)
+        
+        count_sql = self._TABLE_COUNT_SQL.format(table=table)
         
-        return validation_sql.strip(), count_sql.strip()
+        return validation_sql, failed_count_sql, count_sql, {}
     
-    def _generate_statistical_comparison_sql(self, rule: Rule) -> Tuple[str, str]:
+    def _generate_statistical_comparison_sql(self, rule: Rule) -> Tuple[str, str, str, Dict[str, Any]]:
         """Generate SQL for statistical comparison validation"""
-        table = rule.config.table
-        column = rule.config.column
         params = rule.config.parameters
         
-        operation = params['operation'].upper()
-        compare_table = params['compare_table']
-        compare_column = params['compare_column']
-        threshold = params.get('threshold', 0.05)  # 5% default threshold
-        
-        validation_sql = f"""
-            WITH stats1 AS (
-                SELECT {operation}({column}) as value1
-                FROM {table}
-                WHERE {column} IS NOT NULL
-            ),
-            stats2 AS (
-                SELECT {operation}({compare_column}) as value2
-                FROM {compare_table}
-                WHERE {compare_column} IS NOT NULL
-            )
-            SELECT 
-                stats1.value1,
-                stats2.value2,
-                ABS(stats1.value1 - stats2.value2) as difference,
-                CASE 
-                    WHEN stats2.value2 = 0 THEN 
-                        CASE WHEN stats1.value1 = 0 THEN 1 ELSE 0 END
-                    ELSE 
-                        CASE WHEN ABS(stats1.value1 - stats2.value2) / stats2.value2 <= {threshold} THEN 1 ELSE 0 END
-                END as passed
-            FROM stats1, stats2
-        """
-        
-        count_sql = f"""
-            SELECT 1 as total_count
-        """
+        validation_sql, failed_count_sql = self._format_failed(
+            self._STATISTICAL_COMPARISON_SQL, self._STATISTICAL_COMPARISON_COLUMNS,
+            table=self.quote_identifier(rule.config.table),
+            column=self.quote_identifier(self._column(rule)),
+            operation=self._aggregate(params['operation']),
+            compare_table=self.quote_identifier(params['compare_table']),
+            compare_column=self.quote_identifier(params['compare_column'])
+        )
         
-        return validation_sql.strip(), count_sql.strip()
+        # 5% default threshold
+        return validation_sql, failed_count_sql, self._SINGLE_ROW_COUNT_SQL, {'threshold': params.get('threshold', 0.05)}
     
-    def _generate_cross_table_comparison_sql(self, rule: Rule) -> Tuple[str, str]:
+    def _generate_cross_table_comparison_sql(self, rule: Rule) -> Tuple[str, str, str, Dict[str, Any]]:
         """Generate SQL for cross-table comparison validation"""
         table = rule.config.table
-        column = rule.config.column
+        column = self._column(rule)
         params = rule.config.parameters
         
         compare_table = params['compare_table']
-        compare_column = params['compare_column']
         join_key = params.get('join_key', 'id')
-        operation = params.get('operation', 'SUM')
         
         # Handle different join key names for different tables
         # For orders table, use 'id', for order_items table, use 'order_id'
@@ -195,48 +380,31 @@ class SQLGenerator:
             table1_key = join_key
             table2_key = join_key
         
-        validation_sql = f"""
-            WITH table1_agg AS (
-                SELECT {table1_key}, {operation}({column}) as agg_value1
-                FROM {table}
-                WHERE {column} IS NOT NULL
-                GROUP BY {table1_key}
-            ),
-            table2_agg AS (
-                SELECT {table2_key}, {operation}({compare_column}) as agg_value2
-                FROM {compare_table}
-                WHERE {compare_column} IS NOT NULL
-                GROUP BY {table2_key}
-            )
-            SELECT 
-                t1.{table1_key} as join_id,
-                t1.agg_value1,
-                t2.agg_value2,
-                ABS(t1.agg_value1 - COALESCE(t2.agg_value2, 0)) as difference
-            FROM table1_agg t1
-            LEFT JOIN table2_agg t2 ON t1.{table1_key} = t2.{table2_key}
-            WHERE t1.agg_value1 != COALESCE(t2.agg_value2, 0)
-            LIMIT 1000
-        """
+        table = self.quote_identifier(table)
+        column = self.quote_identifier(column)
+        table1_key = self.quote_identifier(table1_key)
         
-        count_sql = f"""
-            SELECT COUNT(DISTINCT {table1_key}) as total_count
-            FROM {table}
-            WHERE {column} IS NOT NULL
-        """
+        validation_sql, failed_count_sql = self._format_failed(
+            self._CROSS_TABLE_COMPARISON_SQL, self._CROSS_TABLE_COMPARISON_COLUMNS.format(table1_key=table1_key),
+            table=table,
+            column=column,
+            compare_table=self.quote_identifier(compare_table),
+            compare_column=self.quote_identifier(params['compare_column']),
+            operation=self._aggregate(params.get('operation', 'SUM')),
+            table1_key=table1_key,
+            table2_key=self.quote_identifier(table2_key)
+        )
+        count_sql = self._DISTINCT_KEY_COUNT_SQL.format(table=table, column=column, key=table1_key)
         
-        return validation_sql.strip(), count_sql.strip()
+        return validation_sql, failed_count_sql, count_sql, {}
     
     def optimize_query(self, sql: str, table: str) -> str:
         """Optimize SQL query for better performance"""
-        # Add basic optimizations
-        optimized = sql
-        
         # Add LIMIT if not present for large tables
-        if 'LIMIT' not in sql.upper():
-            optimized += '\nLIMIT 10000'
+        if _LIMIT_RE.search(sql):
+            return sql
         
         # Add hints for index usage (database-specific)
         # This would be expanded based on database type
         
-        return optimized
\ No newline at end of file
+        return sql + '\nLIMIT 10000'
\ No newline at end of file
@@ -3,16 +3,45 @@
 import json
 import yaml
 import os
+import threading
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from pydantic import BaseModel, Field
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Any, Set, Tuple
+from pydantic import BaseModel, ConfigDict, Field
 import logging
+from ..utils.files import atomic_write
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper  # type: ignore[assignment]
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; fall back to the stdlib json module
+    orjson = None  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 
+# Pre-directory rules file, migrated on first load
+LEGACY_RULES_FILE = ".eda-rules.yaml"
+
+_VALID_RULE_TYPES: FrozenSet[str] = frozenset({
+    'value_range', 'value_template', 'data_continuity',
+    'statistical_comparison', 'cross_table_comparison', 'boolean_combination'
+})
+
+@lru_cache(maxsize=4096)
+def _parse_dt(value: str) -> datetime:
+    """Parse an ISO timestamp; rules imported together often share the same ones"""
+    return datetime.fromisoformat(value)
+
 class RuleConfig(BaseModel):
     """Rule configuration model"""
+    model_config = ConfigDict(extra='ignore')
+    
     table: str
     column: Optional[str] = None
     rule_type: str
@@ -20,6 +49,8 @@ class RuleConfig(BaseModel):
 
 class Rule(BaseModel):
     """Rule model"""
+    model_config = ConfigDict(extra='ignore')
+    
     id: str = Field(default_factory=lambda: str(uuid.uuid4())[:8])
     name: str
     description: str = ""
@@ -34,47 +65,182 @@ class Rule(BaseModel):
 class RuleManager:
     """Manages validation rules"""
     
-    def __init__(self, rules_file: str = ".eda-rules.yaml"):
-        self.rules_file = rules_file
-        self.rules: Dict[str, Rule] = {}
-        self._load_rules()
+    def __init__(self, rules_dir: str = ".eda-rules"):
+        self.rules_dir = rules_dir
+        self._rules: Optional[Dict[str, Rule]] = None  # Loaded on first access
+        # Secondary indexes: attribute value -> rule IDs
+        self._by_status: Dict[str, Set[str]] = {}
+        self._by_table: Dict[str, Set[str]] = {}
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._by_name: Dict[str, Set[str]] = {}
+        # Serialized form of each rule, reused while (updated_at, last_run) is unchanged
+        self._serialized_cache: Dict[str, Tuple[Tuple[datetime, Optional[datetime]], Dict[str, Any]]] = {}
+        # Rule file writes deferred by batch(): rule ID -> rule to write, or None to delete
+        self._dirty: Dict[str, Optional[Rule]] = {}
+        self._batch_depth = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def rules(self) -> Dict[str, Rule]:
+        """All rules by ID, loaded from disk (and indexed) on first access"""
+        self._ensure_loaded()
+        assert self._rules is not None
+        return self._rules
+    
+    def _ensure_loaded(self):
+        """Load and index the rules if that hasn't happened yet"""
+        if self._rules is None:
+            self._load_rules()
+            self._reindex()
+    
+    def _reindex(self):
+        """Rebuild all secondary indexes from self.rules"""
+        self._by_status = {}
+        self._by_table = {}
+        self._by_tag = {}
+        self._by_name = {}
+        for rule in self.rules.values():
+            self._index_rule(rule)
+    
+    def _index_rule(self, rule: Rule):
+        """Add a rule to the secondary indexes"""
+        self._by_status.setdefault(rule.status, set()).add(rule.id)
+        self._by_table.setdefault(rule.config.table, set()).add(rule.id)
+        self._by_name.setdefault(rule.name, set()).add(rule.id)
+        for tag in rule.tags:
+            self._by_tag.setdefault(tag, set()).add(rule.id)
+    
+    def _unindex_rule(self, rule: Rule):
+        """Remove a rule from the secondary indexes"""
+        self._by_status.get(rule.status, set()).discard(rule.id)
+        self._by_table.get(rule.config.table, set()).discard(rule.id)
+        self._by_name.get(rule.name, set()).discard(rule.id)
+        for tag in rule.tags:
+            self._by_tag.get(tag, set()).discard(rule.id)
     
     def _load_rules(self):
-        """Load rules from file"""
-        if os.path.exists(self.rules_file):
+        """Load rules from the rules directory, one YAML file per rule"""
+        self._rules = {}
+        try:
+            entries = list(os.scandir(self.rules_dir))
+        except FileNotFoundError:
+            self._migrate_legacy_rules()
+            return
+        
+        # Load in file name (rule ID) order so listings are stable across runs
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            if not entry.name.endswith('.yaml'):
+                continue
             try:
-                with open(self.rules_file, 'r') as f:
-                    rules_data = yaml.safe_load(f) or {}
-                    for rule_id, rule_dict in rules_data.items():
-                        # Convert datetime strings back to datetime objects
-                        if 'created_at' in rule_dict and isinstance(rule_dict['created_at'], str):
-                            rule_dict['created_at'] = datetime.fromisoformat(rule_dict['created_at'])
-                        if 'updated_at' in rule_dict and isinstance(rule_dict['updated_at'], str):
-                            rule_dict['updated_at'] = datetime.fromisoformat(rule_dict['updated_at'])
-                        if 'last_run' in rule_dict and rule_dict['last_run']:
-                            rule_dict['last_run'] = datetime.fromisoformat(rule_dict['last_run'])
-                        
-                        self.rules[rule_id] = Rule(**rule_dict)
+                with open(entry.path, 'rb') as f:
+                    rule = self._rule_from_dict(yaml.load(f, Loader=SafeLoader), trusted=True)
+                self._rules[rule.id] = rule
             except Exception as e:
-                logger.warning(f"Could not load rules file: {e}")
-                self.rules = {}
-        else:
-            self.rules = {}
+                logger.warning(f"Could not load rule file {entry.name}: {e}")
     
-    def _save_rules(self):
-        """Save rules to file"""
-        rules_data = {}
-        for rule_id, rule in self.rules.items():
-            rule_dict = rule.model_dump()
-            # Convert datetime objects to strings for YAML serialization
-            rule_dict['created_at'] = rule_dict['created_at'].isoformat()
-            rule_dict['updated_at'] = rule_dict['updated_at'].isoformat()
-            if rule_dict['last_run']:
-                rule_dict['last_run'] = rule_dict['last_run'].isoformat()
-            rules_data[rule_id] = rule_dict
+    def _migrate_legacy_rules(self):
+        """Convert a legacy single-file rules store into the rules directory"""
+        legacy_file = os.path.join(os.path.dirname(self.rules_dir), LEGACY_RULES_FILE)
+        try:
+            with open(legacy_file, 'rb') as f:
+                rules_data = yaml.load(f, Loader=SafeLoader) or {}
+            for rule_dict in rules_data.values():
+                rule = self._rule_from_dict(rule_dict, trusted=True)
+                self._rules[rule.id] = rule
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Could not load rules file: {e}")
+            self._rules = {}
+            return
+        self._save_rules()
+    
+    @staticmethod
+    def _rule_from_dict(rule_dict: Dict[str, Any], trusted: bool = False) -> Rule:
+        """Build a rule from its serialized form
         
-        with open(self.rules_file, 'w') as f:
-            yaml.dump(rules_data, f, default_flow_style=False)
+        Trusted data (files this manager wrote) skips pydantic validation.
+        """
+        # Convert datetime strings back to datetime objects
+        if 'created_at' in rule_dict and isinstance(rule_dict['created_at'], str):
+            rule_dict['created_at'] = _parse_dt(rule_dict['created_at'])
+        if 'updated_at' in rule_dict and isinstance(rule_dict['updated_at'], str):
+            rule_dict['updated_at'] = _parse_dt(rule_dict['updated_at'])
+        if 'last_run' in rule_dict and isinstance(rule_dict['last_run'], str):
+            rule_dict['last_run'] = _parse_dt(rule_dict['last_run'])
+        if trusted:
+            config = RuleConfig.model_construct(**rule_dict.pop('config'))
+            return Rule.model_construct(config=config, **rule_dict)
+        return Rule(**rule_dict)
+    
+    def _rule_to_dict(self, rule: Rule) -> Dict[str, Any]:
+        """Serialize a rule for YAML storage; treat the returned dict as read-only"""
+        version = (rule.updated_at, rule.last_run)
+        cached = self._serialized_cache.get(rule.id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        # JSON mode emits datetimes as ISO strings, ready for YAML serialization
+        rule_dict = rule.model_dump(mode='json')
+        self._serialized_cache[rule.id] = (version, rule_dict)
+        return rule_dict
+    
+    def _rule_path(self, rule_id: str) -> str:
+        """Path of the file holding a rule"""
+        return os.path.join(self.rules_dir, f"{rule_id}.yaml")
+    
+    def _save_rule(self, rule: Rule):
+        """Write a single rule's file, or defer the write inside a batch"""
+        with self._lock:
+            if self._batch_depth:
+                self._dirty[rule.id] = rule
+                return
+            self._write_rule_file(rule)
+    
+    def _delete_rule_file(self, rule_id: str):
+        """Remove a rule's file, or defer the removal inside a batch"""
+        with self._lock:
+            if self._batch_depth:
+                self._dirty[rule_id] = None
+                return
+            self._unlink_rule_file(rule_id)
+    
+    def _write_rule_file(self, rule: Rule):
+        """Write a single rule's file, replacing it atomically"""
+        os.makedirs(self.rules_dir, exist_ok=True)
+        with atomic_write(self._rule_path(rule.id)) as f:
+            yaml.dump(self._rule_to_dict(rule), f, Dumper=SafeDumper,
+                      default_flow_style=None, sort_keys=False, allow_unicode=True, width=10_000)
+    
+    def _unlink_rule_file(self, rule_id: str):
+        """Remove a rule's file if it exists"""
+        try:
+            os.unlink(self._rule_path(rule_id))
+        except FileNotFoundError:
+            pass
+    
+    @contextmanager
+    def batch(self):
+        """Defer rule file writes made inside the block and apply them once on exit"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    for rule_id, rule in self._dirty.items():
+                        if rule is None:
+                            self._unlink_rule_file(rule_id)
+                        else:
+                            self._write_rule_file(rule)
+                    self._dirty.clear()
+    
+    def _save_rules(self):
+        """Save every rule to its file"""
+        for rule in self.rules.values():
+            self._save_rule(rule)
     
     def create_rule(
         self, 
@@ -87,12 +253,8 @@ class RuleManager:
         """Create a new validation rule"""
         
         # Validate rule type
-        valid_types = [
-            'value_range', 'value_template', 'data_continuity', 
-            'statistical_comparison', 'cross_table_comparison', 'boolean_combination'
-        ]
-        if rule_type not in valid_types:
-            raise ValueError(f"Invalid rule type: {rule_type}. Valid types: {valid_types}")
+        if rule_type not in _VALID_RULE_TYPES:
+            raise ValueError(f"Invalid rule type: {rule_type}. Valid types: {sorted(_VALID_RULE_TYPES)}")
         
         # Create rule configuration
         rule_config = RuleConfig(
@@ -111,8 +273,17 @@ class RuleManager:
             tags=tags or []
         )
         
+        # Rules not loaded yet don't need to be: the new rule's file is all that is written,
+        # and it is picked up from disk on first access. Not inside a batch, where the write
+        # is deferred and a load before it lands would miss the rule, nor while a legacy
+        # file awaits migration.
+        if self._rules is None and not self._batch_depth and os.path.isdir(self.rules_dir):
+            self._save_rule(rule)
+            return rule.id
+        
         self.rules[rule.id] = rule
-        self._save_rules()
+        self._index_rule(rule)
+        self._save_rule(rule)
         
         return rule.id
     
@@ -123,25 +294,32 @@ class RuleManager:
             return self.rules[rule_id]
         
         # Try to find by name
-        for rule in self.rules.values():
-            if rule.name == rule_id:
-                return rule
+        rule_ids = self._by_name.get(rule_id)
+        if rule_ids:
+            return self.rules[next(iter(rule_ids))]
         
         return None
     
     def list_rules(self, status: Optional[str] = None, table: Optional[str] = None, tag: Optional[str] = None) -> List[Dict]:
         """List rules with optional filtering"""
-        filtered_rules = []
+        all_rules = self.rules
         
-        for rule in self.rules.values():
-            # Apply filters
-            if status and rule.status != status:
-                continue
-            if table and rule.config.table != table:
-                continue
-            if tag and tag not in rule.tags:
-                continue
-            
+        # Intersect the index for each filter given
+        candidates: Optional[Set[str]] = None
+        for index, value in ((self._by_status, status), (self._by_table, table), (self._by_tag, tag)):
+            if value:
+                rule_ids = index.get(value, set())
+                candidates = rule_ids if candidates is None else candidates & rule_ids
+        
+        if candidates is None:
+            rules = list(all_rules.values())
+        else:
+            rules = [all_rules[rule_id] for rule_id in candidates]
+        # Creation order, whether or not the listing was filtered
+        rules.sort(key=lambda rule: (rule.created_at, rule.id))
+        
+        filtered_rules = []
+        for rule in rules:
             filtered_rules.append({
                 'id': rule.id,
                 'name': rule.name,
@@ -163,12 +341,14 @@ class RuleManager:
         
         # Update allowed fields
         allowed_updates = ['name', 'description', 'status', 'tags']
+        self._unindex_rule(rule)
         for key, value in updates.items():
             if key in allowed_updates and hasattr(rule, key):
                 setattr(rule, key, value)
+        self._index_rule(rule)
         
         rule.updated_at = datetime.now()
-        self._save_rules()
+        self._save_rule(rule)
         return True
     
     def delete_rule(self, rule_id: str) -> bool:
@@ -178,7 +358,9 @@ class RuleManager:
             return False
         
         del self.rules[rule.id]
-        self._save_rules()
+        self._serialized_cache.pop(rule.id, None)
+        self._unindex_rule(rule)
+        self._delete_rule_file(rule.id)
         return True
     
     def update_last_run(self, rule_id: str):
@@ -186,15 +368,30 @@ class RuleManager:
         rule = self.get_rule(rule_id)
         if rule:
             rule.last_run = datetime.now()
-            self._save_rules()
+            self._serialized_cache.pop(rule.id, None)
+            self._save_rule(rule)
+    
+    def _grouped(self, rule_ids: Set[str]) -> List[Rule]:
+        """Rules for the given IDs, grouped by rule type (and by ID within a type)"""
+        rules = self.rules
+        return sorted((rules[rule_id] for rule_id in rule_ids), key=lambda rule: (rule.rule_type, rule.id))
+    
+    def get_active_rules(self) -> List[Rule]:
+        """Get all active rules, grouped by rule type"""
+        self._ensure_loaded()
+        return self._grouped(self._by_status.get('active', set()))
     
     def get_rules_for_table(self, table: str) -> List[Rule]:
-        """Get all rules for a specific table"""
-        return [rule for rule in self.rules.values() if rule.config.table == table and rule.status == 'active']
+        """Get all active rules for a specific table, grouped by rule type"""
+        self._ensure_loaded()
+        active = self._by_status.get('active', set())
+        return self._grouped(self._by_table.get(table, set()) & active)
     
     def get_rules_by_tag(self, tag: str) -> List[Rule]:
-        """Get all rules with a specific tag"""
-        return [rule for rule in self.rules.values() if tag in rule.tags and rule.status == 'active']
+        """Get all active rules with a specific tag, grouped by rule type"""
+        self._ensure_loaded()
+        active = self._by_status.get('active', set())
+        return self._grouped(self._by_tag.get(tag, set()) & active)
     
     def export_rules(self, file_path: str, format: str = 'yaml'):
         """Export rules to a file"""
@@ -203,40 +400,43 @@ class RuleManager:
             rules_data[rule_id] = rule.model_dump()
         
         if format.lower() == 'json':
-            with open(file_path, 'w') as f:
-                json.dump(rules_data, f, indent=2, default=str)
+            if orjson is not None:
+                # orjson serializes datetimes natively as ISO strings
+                with open(file_path, 'wb') as f:
+                    f.write(orjson.dumps(rules_data, default=str, option=orjson.OPT_INDENT_2))
+            else:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    json.dump(rules_data, f, indent=2, default=str, ensure_ascii=False)
         else:  # yaml
-            with open(file_path, 'w') as f:
-                yaml.dump(rules_data, f, default_flow_style=False)
+            with open(file_path, 'w', encoding='utf-8') as f:
+                yaml.dump(rules_data, f, Dumper=SafeDumper,
+                          default_flow_style=None, sort_keys=False, allow_unicode=True, width=10_000)
     
     def import_rules(self, file_path: str, format: str = 'yaml'):
         """Import rules from a file"""
         try:
             if format.lower() == 'json':
-                with open(file_path, 'r') as f:
-                    rules_data = json.load(f)
+                with open(file_path, 'rb') as f:
+                    rules_data = orjson.loads(f.read()) if orjson is not None else json.load(f)
             else:  # yaml
-                with open(file_path, 'r') as f:
-                    rules_data = yaml.safe_load(f)
+                # Read bytes so the YAML parser decodes UTF-8 regardless of the locale
+                with open(file_path, 'rb') as f:
+                    rules_data = yaml.load(f, Loader=SafeLoader)
             
             imported_count = 0
             for rule_id, rule_dict in rules_data.items():
                 try:
-                    # Convert string dates back to datetime objects
-                    if 'created_at' in rule_dict and isinstance(rule_dict['created_at'], str):
-                        rule_dict['created_at'] = datetime.fromisoformat(rule_dict['created_at'])
-                    if 'updated_at' in rule_dict and isinstance(rule_dict['updated_at'], str):
-                        rule_dict['updated_at'] = datetime.fromisoformat(rule_dict['updated_at'])
-                    if 'last_run' in rule_dict and rule_dict['last_run']:
-                        rule_dict['last_run'] = datetime.fromisoformat(rule_dict['last_run'])
-                    
-                    rule = Rule(**rule_dict)
+                    rule = self._rule_from_dict(rule_dict)
+                    if rule.id in self.rules:
+                        self._unindex_rule(self.rules[rule.id])
+                        self._serialized_cache.pop(rule.id, None)
                     self.rules[rule.id] = rule
+                    self._index_rule(rule)
+                    self._save_rule(rule)
                     imported_count += 1
                 except Exception as e:
                     logger.warning(f"Could not import rule {rule_id}: {e}")
             
-            self._save_rules()
             return imported_count
             
         except Exception as e:
@@ -1,56 +1,143 @@
 """Configuration manager for EDA Rule Engine"""
 
+import copy
 import yaml
 import os
-from typing import Dict, Any, Optional
-from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+from .files import atomic_write
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper  # type: ignore[assignment]
+
+# Skeleton written by init_project; project-specific fields are filled in per call
+_PROJECT_TEMPLATE: Dict[str, Any] = {
+    'project': {
+        'name': None,
+        'version': '1.0.0',
+        'created_at': None,
+        'project_root': None,
+        'default_database_type': None
+    },
+    'databases': {},
+    'settings': {
+        'max_workers': 4,
+        'query_timeout': 300,
+        'result_cache_ttl': 3600,
+        'log_level': 'INFO'
+    }
+}
+
+@lru_cache(maxsize=128)
+def _key_parts(key: str) -> Tuple[str, ...]:
+    """Split a dotted configuration key, once per distinct key"""
+    return tuple(key.split('.'))
 
 class ConfigManager:
     """Manages project configuration"""
     
     def __init__(self, config_file: str = ".eda-config.yaml"):
         self.config_file = config_file
-        self.config = self._load_config()
+        self._config: Optional[Dict[str, Any]] = None  # Parsed on first access
+        # Saves requested inside batch() are coalesced into one write on exit
+        self._batch_depth = 0
+        self._dirty = False
+    
+    @property
+    def config(self) -> Dict[str, Any]:
+        """The full configuration, parsed from file on first access"""
+        if self._config is None:
+            self._config = self._load_config()
+        return self._config
+    
+    @config.setter
+    def config(self, value: Dict[str, Any]):
+        self._config = value
     
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from file"""
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r') as f:
-                    return yaml.safe_load(f) or {}
-            except Exception:
-                return {}
-        return {}
+        try:
+            with open(self.config_file, 'rb') as f:
+                return yaml.load(f, Loader=SafeLoader) or {}
+        except Exception:  # Includes FileNotFoundError: no config yet
+            return {}
+    
+    def _load_header(self, top_key: str) -> Any:
+        """Parse just one top-level section of the config file
+        
+        Reads lines up to the end of that section instead of parsing the whole file.
+        Falls back to the full configuration if the section can't be isolated.
+        """
+        if self._config is not None:
+            return self._config.get(top_key)
+        
+        prefix = f"{top_key}:".encode()
+        lines: List[bytes] = []
+        try:
+            with open(self.config_file, 'rb') as f:
+                for line in f:
+                    if lines:
+                        # A new top-level key ends the section
+                        if line[:1] not in (b' ', b'\t', b'\r', b'\n', b'#'):
+                            break
+                        lines.append(line)
+                    elif line.startswith(prefix):
+                        lines.append(line)
+            if lines:
+                section = yaml.load(b''.join(lines), Loader=SafeLoader)
+                if isinstance(section, dict) and top_key in section:
+                    return section[top_key]
+        except FileNotFoundError:
+            return None
+        except Exception:
+            pass
+        return self.config.get(top_key)
     
     def _save_config(self):
-        """Save configuration to file"""
-        with open(self.config_file, 'w') as f:
-            yaml.dump(self.config, f, default_flow_style=False)
+        """Save configuration to file, or defer the write inside a batch"""
+        if self._batch_depth:
+            self._dirty = True
+            return
+        self._write_config()
+    
+    def _write_config(self):
+        """Write the configuration file atomically"""
+        with atomic_write(self.config_file) as f:
+            yaml.dump(self.config, f, Dumper=SafeDumper,
+                      default_flow_style=None, sort_keys=False, allow_unicode=True, width=10_000)
+    
+    @contextmanager
+    def batch(self):
+        """Defer config writes made inside the block and write the file once on exit"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._dirty:
+                self._dirty = False
+                self._write_config()
     
     def init_project(self, project_name: str, database_type: str):
         """Initialize a new project configuration"""
-        self.config = {
-            'project': {
-                'name': project_name,
-                'version': '1.0.0',
-                'created_at': str(Path().cwd()),
-                'default_database_type': database_type
-            },
-            'databases': {},
-            'settings': {
-                'max_workers': 4,
-                'query_timeout': 300,
-                'result_cache_ttl': 3600,
-                'log_level': 'INFO'
-            }
-        }
+        config = copy.deepcopy(_PROJECT_TEMPLATE)
+        config['project'].update({
+            'name': project_name,
+            'created_at': datetime.now().isoformat(),
+            'project_root': os.getcwd(),
+            'default_database_type': database_type
+        })
+        self.config = config
         self._save_config()
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value"""
-        keys = key.split('.')
         value = self.config
-        for k in keys:
+        for k in _key_parts(key):
             if isinstance(value, dict) and k in value:
                 value = value[k]
             else:
@@ -59,7 +146,7 @@ class ConfigManager:
     
     def set(self, key: str, value: Any):
         """Set configuration value"""
-        keys = key.split('.')
+        keys = _key_parts(key)
         config = self.config
         for k in keys[:-1]:
             if k not in config:
@@ -70,8 +157,12 @@ class ConfigManager:
     
     def get_project_name(self) -> Optional[str]:
         """Get project name"""
-        return self.get('project.name')
+        project = self._load_header('project')
+        return project.get('name') if isinstance(project, dict) else None
     
     def get_default_database_type(self) -> str:
         """Get default database type"""
-        return self.get('project.default_database_type', 'postgresql')
\ No newline at end of file
+        project = self._load_header('project')
+        if isinstance(project, dict) and 'default_database_type' in project:
+            return project['default_database_type']
+        return 'postgresql'
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""File helpers for EDA Rule Engine"""
+
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional
+
+_umask: Optional[int] = None
+_umask_lock = threading.Lock()
+
+def _new_file_mode() -> int:
+    """Permissions open() would give a new file, reading the process umask on first use"""
+    global _umask
+    with _umask_lock:
+        if _umask is None:
+            # umask can only be read by setting it; probe with a safe value, not 0
+            _umask = os.umask(0o022)
+            os.umask(_umask)
+    return 0o666 & ~_umask
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w') -> Iterator[IO]:
+    """Write a file atomically
+    
+    Yields a temporary file in the same directory; once the block completes it is
+    fsynced and moved over path, so readers see either the old or the new contents.
+    A replaced file keeps its permissions; a new file gets the umask default.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            # mkstemp creates files 0600
+            try:
+                file_mode = stat.S_IMODE(os.stat(path).st_mode)
+            except FileNotFoundError:
+                file_mode = _new_file_mode()
+            os.fchmod(f.fileno(), file_mode)
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
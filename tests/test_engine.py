@@ -0,0 +1,40 @@
+"""Tests for RuleEngine against a sample SQLite database"""
+
+import os
+import sqlite3
+
+import pytest
+
+from eda_rule_engine.core.engine import RuleEngine
+from eda_rule_engine.database.manager import DatabaseManager
+from eda_rule_engine.rules.manager import RuleManager
+
+SAMPLE_DATA = os.path.join(os.path.dirname(__file__), '..', 'sample_data.sql')
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Reporter keeps its history in the working directory
+    database = str(tmp_path / 'sample.db')
+    with open(SAMPLE_DATA) as f, sqlite3.connect(database) as conn:
+        conn.executescript(f.read())
+    
+    db_manager = DatabaseManager(str(tmp_path / '.eda-config.yaml'))
+    db_manager.add_connection('sample', 'sqlite', 'localhost', 0, database)
+    return RuleEngine(db_manager, RuleManager(str(tmp_path / '.eda-rules')))
+
+def test_generator_follows_connection_type(engine):
+    engine.db_manager.connections['warehouse'] = {'type': 'mysql'}
+    
+    assert engine._sql_generator_for('sample').database_type == 'sqlite'
+    assert engine._sql_generator_for('warehouse').database_type == 'mysql'
+    assert engine._sql_generator_for('sample') is engine._sql_generator_for('sample')
+
+def test_missing_reserved_word_column_reports_an_error(engine):
+    rule_id = engine.rule_manager.create_rule(
+        'order_range', 'value_range', {'table': 'orders', 'column': 'order', 'min_value': 0, 'max_value': 10}
+    )
+    
+    result = engine.execute_rule(rule_id, 'sample')
+    
+    assert result['error'] and 'no such column' in result['error']
+    assert result['failed_records'] == 0
@@ -0,0 +1,41 @@
+"""Tests for the atomic file writer"""
+
+import os
+import stat
+
+import pytest
+
+from eda_rule_engine.utils.files import atomic_write
+
+def test_replacing_keeps_permissions(tmp_path):
+    path = tmp_path / 'config.yaml'
+    path.write_text('old')
+    os.chmod(path, 0o640)
+    
+    with atomic_write(str(path)) as f:
+        f.write('new')
+    
+    assert path.read_text() == 'new'
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+
+def test_failed_write_leaves_original(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    path.write_bytes(b'old\n')
+    
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path), 'wb') as f:
+            f.write(b'partial')
+            raise RuntimeError('boom')
+    
+    assert path.read_bytes() == b'old\n'
+    assert os.listdir(tmp_path) == ['results.jsonl']
+
+def test_new_file_gets_umask_default(tmp_path):
+    path = tmp_path / 'new.yaml'
+    plain = tmp_path / 'plain.yaml'
+    plain.write_text('x')
+    
+    with atomic_write(str(path)) as f:
+        f.write('new')
+    
+    assert stat.S_IMODE(os.stat(path).st_mode) == stat.S_IMODE(os.stat(plain).st_mode)
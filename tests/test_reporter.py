@@ -0,0 +1,84 @@
+"""Tests for Reporter's JSONL results history"""
+
+import json
+import os
+
+import pytest
+
+from eda_rule_engine.core.reporter import LEGACY_RESULTS_FILE, Reporter
+
+@pytest.fixture
+def results_file(tmp_path):
+    return str(tmp_path / '.eda-results.jsonl')
+
+def make_result(rule_id, passed=True):
+    return {'rule_id': rule_id, 'rule_name': f'rule_{rule_id}', 'passed': passed, 'pass_rate': 100.0}
+
+def read_lines(path):
+    with open(path) as f:
+        return f.read().splitlines()
+
+def test_results_are_appended_and_reloaded(results_file):
+    reporter = Reporter(results_file)
+    reporter.record_execution_result(make_result('a'))
+    reporter.record_execution_result(make_result('b', passed=False))
+    
+    assert len(read_lines(results_file)) == 2
+    
+    history = list(Reporter(results_file).results_history)
+    assert [r['rule_id'] for r in history] == ['a', 'b']
+    assert all('timestamp' in r and '_ts' in r for r in history)
+
+def test_corrupt_lines_are_skipped(results_file):
+    reporter = Reporter(results_file)
+    reporter.record_execution_result(make_result('a'))
+    with open(results_file, 'a') as f:
+        f.write('{"rule_id": "torn\n\n')
+    reporter.record_execution_result(make_result('b'))
+    
+    assert [r['rule_id'] for r in Reporter(results_file).results_history] == ['a', 'b']
+
+def test_legacy_history_is_migrated(tmp_path, results_file):
+    legacy = [dict(make_result('old'), timestamp='2024-01-01T00:00:00')]
+    with open(tmp_path / LEGACY_RESULTS_FILE, 'w') as f:
+        json.dump(legacy, f)
+    
+    history = list(Reporter(results_file).results_history)
+    
+    assert [r['rule_id'] for r in history] == ['old']
+    assert history[0]['_ts'] > 0
+    assert [json.loads(line)['rule_id'] for line in read_lines(results_file)] == ['old']
+
+def test_history_file_is_compacted(results_file, monkeypatch):
+    monkeypatch.setattr(Reporter, 'HISTORY_LIMIT', 3)
+    reporter = Reporter(results_file)
+    for n in range(7):
+        reporter.record_execution_result(make_result(str(n)))
+    
+    # The seventh append passes twice the limit and rewrites just the newest results
+    assert [json.loads(line)['rule_id'] for line in read_lines(results_file)] == ['4', '5', '6']
+    assert [r['rule_id'] for r in Reporter(results_file).results_history] == ['4', '5', '6']
+
+def test_batch_defers_appends_until_exit(results_file):
+    reporter = Reporter(results_file)
+    
+    with reporter.batch():
+        reporter.record_execution_result(make_result('a'))
+        reporter.record_execution_result(make_result('b'))
+        assert len(reporter.results_history) == 2
+        assert not os.path.exists(results_file)
+    
+    assert len(read_lines(results_file)) == 2
+
+def test_results_since_uses_the_trimmed_history(results_file, monkeypatch):
+    monkeypatch.setattr(Reporter, 'HISTORY_LIMIT', 4)
+    reporter = Reporter(results_file)
+    for n in range(6):
+        reporter.record_execution_result(make_result(str(n)))
+    for n, result in enumerate(reporter.results_history):
+        result['_ts'] = float(n)
+    reporter._ts_index[:] = [float(n) for n in range(len(reporter.results_history))]
+    
+    assert [r['rule_id'] for r in reporter.results_history] == ['2', '3', '4', '5']
+    assert len(reporter._ts_index) == 4
+    assert [r['rule_id'] for r in reporter._results_since(2.0)] == ['4', '5']
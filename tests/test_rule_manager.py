@@ -0,0 +1,161 @@
+"""Tests for RuleManager's per-rule file storage"""
+
+import os
+
+import pytest
+import yaml
+
+from eda_rule_engine.rules.manager import LEGACY_RULES_FILE, RuleManager
+
+RANGE_CONFIG = {'table': 'users', 'column': 'age', 'min_value': 0, 'max_value': 120}
+
+@pytest.fixture
+def rules_dir(tmp_path):
+    return str(tmp_path / '.eda-rules')
+
+def rule_files(rules_dir):
+    return sorted(name for name in os.listdir(rules_dir) if name.endswith('.yaml'))
+
+def write_legacy_rules(tmp_path):
+    legacy = {
+        'abc12345': {
+            'id': 'abc12345',
+            'name': 'legacy_age',
+            'description': '',
+            'rule_type': 'value_range',
+            'config': {
+                'table': 'users',
+                'column': 'age',
+                'rule_type': 'value_range',
+                'parameters': RANGE_CONFIG,
+            },
+            'status': 'active',
+            'created_at': '2024-01-01T00:00:00',
+            'updated_at': '2024-01-02T00:00:00',
+            'last_run': None,
+            'tags': ['legacy'],
+        }
+    }
+    with open(tmp_path / LEGACY_RULES_FILE, 'w') as f:
+        yaml.safe_dump(legacy, f)
+
+def test_legacy_rules_file_is_migrated(tmp_path, rules_dir):
+    write_legacy_rules(tmp_path)
+    
+    manager = RuleManager(rules_dir)
+    rule = manager.get_rule('legacy_age')
+    
+    assert rule is not None
+    assert rule.id == 'abc12345'
+    assert rule.updated_at.isoformat() == '2024-01-02T00:00:00'
+    assert rule_files(rules_dir) == ['abc12345.yaml']
+    assert (tmp_path / LEGACY_RULES_FILE).exists()
+    
+    # A second manager reads the directory, not the legacy file
+    assert [r.name for r in RuleManager(rules_dir).get_rules_by_tag('legacy')] == ['legacy_age']
+
+def test_create_update_delete_round_trip(rules_dir):
+    manager = RuleManager(rules_dir)
+    rule_id = manager.create_rule('age_range', 'value_range', RANGE_CONFIG, tags=['users'])
+    assert rule_files(rules_dir) == [f'{rule_id}.yaml']
+    
+    reloaded = RuleManager(rules_dir).get_rule(rule_id)
+    assert reloaded.name == 'age_range'
+    assert reloaded.config.parameters['max_value'] == 120
+    assert reloaded.tags == ['users']
+    
+    assert manager.update_rule(rule_id, status='inactive', description='paused')
+    manager.update_last_run(rule_id)
+    reloaded = RuleManager(rules_dir).get_rule(rule_id)
+    assert reloaded.status == 'inactive'
+    assert reloaded.description == 'paused'
+    assert reloaded.last_run is not None
+    assert RuleManager(rules_dir).get_rules_for_table('users') == []
+    
+    assert manager.delete_rule(rule_id)
+    assert rule_files(rules_dir) == []
+    assert RuleManager(rules_dir).get_rule(rule_id) is None
+
+def test_only_the_changed_rule_file_is_rewritten(rules_dir):
+    manager = RuleManager(rules_dir)
+    first = manager.create_rule('first', 'value_range', RANGE_CONFIG)
+    second = manager.create_rule('second', 'value_range', RANGE_CONFIG)
+    first_path = os.path.join(rules_dir, f'{first}.yaml')
+    mtime = os.stat(first_path).st_mtime_ns
+    
+    manager.update_rule(second, description='changed')
+    
+    assert os.stat(first_path).st_mtime_ns == mtime
+
+def test_non_ascii_text_survives_reload(rules_dir):
+    manager = RuleManager(rules_dir)
+    rule_id = manager.create_rule('règle', 'value_range', RANGE_CONFIG, description='âge ≤ 120')
+    
+    assert RuleManager(rules_dir).get_rule(rule_id).description == 'âge ≤ 120'
+
+def test_batch_defers_writes_until_exit(rules_dir):
+    manager = RuleManager(rules_dir)
+    kept = manager.create_rule('kept', 'value_range', RANGE_CONFIG)
+    dropped = manager.create_rule('dropped', 'value_range', RANGE_CONFIG)
+    
+    with manager.batch():
+        added = manager.create_rule('added', 'value_range', RANGE_CONFIG)
+        manager.update_last_run(kept)
+        manager.delete_rule(dropped)
+        assert rule_files(rules_dir) == sorted([f'{kept}.yaml', f'{dropped}.yaml'])
+        assert RuleManager(rules_dir).get_rule(kept).last_run is None
+    
+    assert rule_files(rules_dir) == sorted([f'{kept}.yaml', f'{added}.yaml'])
+    assert RuleManager(rules_dir).get_rule(kept).last_run is not None
+
+def test_rule_created_in_batch_before_load_stays_visible(rules_dir):
+    RuleManager(rules_dir).create_rule('existing', 'value_range', RANGE_CONFIG)
+    manager = RuleManager(rules_dir)  # Rules not loaded yet
+    
+    with manager.batch():
+        added = manager.create_rule('added', 'value_range', RANGE_CONFIG)
+        assert manager.get_rule(added) is not None
+    
+    assert manager.get_rule(added) is not None
+    assert len(manager.rules) == 2
+    assert len(RuleManager(rules_dir).rules) == 2
+
+@pytest.mark.parametrize('format', ['yaml', 'json'])
+def test_export_import_round_trip(tmp_path, rules_dir, format):
+    manager = RuleManager(rules_dir)
+    rule_id = manager.create_rule('règle', 'value_range', RANGE_CONFIG, description='âge ≤ 120')
+    export_path = str(tmp_path / f'rules.{format}')
+    manager.export_rules(export_path, format=format)
+    
+    imported = RuleManager(str(tmp_path / 'imported'))
+    
+    assert imported.import_rules(export_path, format=format) == 1
+    assert imported.get_rule(rule_id).description == 'âge ≤ 120'
+    assert RuleManager(str(tmp_path / 'imported')).get_rule('règle').id == rule_id
+
+def test_import_drops_unknown_fields(tmp_path, rules_dir):
+    import_path = tmp_path / 'rules.yaml'
+    rules = {
+        'extra': {'name': 'extra', 'rule_type': 'value_range', 'owner': 'data-team',
+                  'config': {'table': 'users', 'rule_type': 'value_range', 'notes': 'legacy'}},
+    }
+    with open(import_path, 'w') as f:
+        yaml.safe_dump(rules, f)
+    
+    manager = RuleManager(rules_dir)
+    
+    assert manager.import_rules(str(import_path)) == 1
+    rule = manager.get_rule('extra')
+    assert 'owner' not in rule.model_dump()
+    assert 'notes' not in rule.config.model_dump()
+
+def test_list_rules_in_creation_order(rules_dir):
+    manager = RuleManager(rules_dir)
+    names = ['zeta', 'alpha', 'mid']
+    for name in names:
+        manager.create_rule(name, 'value_range', RANGE_CONFIG, tags=['users'])
+    
+    reloaded = RuleManager(rules_dir)
+    assert [r['name'] for r in reloaded.list_rules()] == names
+    assert [r['name'] for r in reloaded.list_rules(tag='users')] == names
+    assert [r['name'] for r in reloaded.list_rules(status='active', table='users')] == names
@@ -0,0 +1,105 @@
+"""Tests for SQLGenerator against the sample SQLite database"""
+
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from eda_rule_engine.parsers.sql_generator import (
+    FAILED_COUNT_COLUMN,
+    TOTAL_COUNT_COLUMN,
+    SQLGenerator,
+)
+from eda_rule_engine.rules.manager import Rule, RuleConfig
+
+SAMPLE_DATA = os.path.join(os.path.dirname(__file__), '..', 'sample_data.sql')
+
+@pytest.fixture
+def conn():
+    connection = sqlite3.connect(':memory:')
+    connection.row_factory = sqlite3.Row
+    with open(SAMPLE_DATA) as f:
+        connection.executescript(f.read())
+    yield connection
+    connection.close()
+
+def make_rule(rule_type, table, column, **parameters):
+    parameters.update(table=table, column=column)
+    return Rule(
+        name=f'{table}_{column}_{rule_type}',
+        rule_type=rule_type,
+        config=RuleConfig(table=table, column=column, rule_type=rule_type, parameters=parameters),
+    )
+
+def query(conn, sql, params):
+    return [dict(row) for row in conn.execute(sql, params)]
+
+@pytest.mark.parametrize('column', ['name', 'ID', 'email'])
+def test_value_template_selects_each_column_once(conn, column):
+    rule = make_rule('value_template', 'users', column, pattern='[A-Z]*')
+    generator = SQLGenerator('sqlite')
+    
+    sample_sql, counts_sql, params = generator.generate_validation_sql(rule)
+    samples = query(conn, sample_sql, params)
+    counts = query(conn, counts_sql, params)[0]
+    
+    combined_sql, combined_params = generator.generate_combined_sql(rule)
+    rows = query(conn, combined_sql, combined_params)
+    
+    assert rows[0][TOTAL_COUNT_COLUMN] == counts['total_count']
+    assert rows[0][FAILED_COUNT_COLUMN] == counts['failed_count']
+    for row in samples + rows:
+        assert not any(':' in key for key in row)
+        assert {'id', 'name'} <= {key.lower() for key in row}
+
+@pytest.mark.parametrize('rule', [
+    make_rule('value_range', 'users', 'age', min_value=18, max_value=65),
+    make_rule('value_template', 'users', 'id', pattern='[0-9]+'),
+    make_rule('data_continuity', 'users', 'email'),
+    make_rule('data_continuity', 'orders', 'id', check_type='sequence_gaps'),
+    make_rule('statistical_comparison', 'orders', 'total_amount',
+              operation='sum', compare_table='order_items', compare_column='line_total'),
+    make_rule('cross_table_comparison', 'orders', 'total_amount',
+              operation='sum', compare_table='order_items', compare_column='line_total'),
+], ids=lambda rule: rule.name)
+def test_failed_count_matches_failed_records(conn, rule):
+    generator = SQLGenerator('sqlite', failed_sample_limit=1000)
+    
+    sample_sql, counts_sql, params = generator.generate_validation_sql(rule)
+    
+    # Failures are counted over the filtered base query, not a derived table of its select list
+    assert ') t)' not in counts_sql
+    assert query(conn, counts_sql, params)[0]['failed_count'] == len(query(conn, sample_sql, params))
+
+def test_sql_cache_evicts_safely_across_threads():
+    generator = SQLGenerator('sqlite')
+    generator.CACHE_SIZE = 8
+    rules = [make_rule('value_range', 'users', 'age', min_value=0, max_value=n) for n in range(200)]
+    
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(generator.generate_validation_sql, rules * 5))
+    
+    assert [params['max_val'] for _, _, params in results] == list(range(200)) * 5
+    assert len(generator._sql_cache) <= 8
+
+@pytest.mark.parametrize('database_type, quoted', [
+    ('mysql', '`order`'),
+    ('sqlite', '`order`'),
+    ('postgresql', '"order"'),
+])
+def test_reserved_word_column_is_quoted_for_dialect(database_type, quoted):
+    rule = make_rule('value_range', 'orders', 'order', min_value=0, max_value=10)
+    
+    sample_sql, counts_sql, _ = SQLGenerator(database_type).generate_validation_sql(rule)
+    
+    assert f'WHERE {quoted} IS NOT NULL' in sample_sql
+    assert f'{quoted} IS NOT NULL' in counts_sql
+    assert ' order ' not in sample_sql
+
+def test_missing_reserved_word_column_is_an_error(conn):
+    rule = make_rule('value_range', 'orders', 'order', min_value=0, max_value=10)
+    sample_sql, _, params = SQLGenerator('sqlite').generate_validation_sql(rule)
+    
+    with pytest.raises(sqlite3.OperationalError, match='no such column'):
+        query(conn, sample_sql, params)